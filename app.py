@@ -6,6 +6,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from sqlalchemy.orm import DeclarativeBase
 from flask_migrate import Migrate  # ✅ Import Migrate
+from config import env_flag
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -58,4 +59,13 @@ with app.app_context():
     from routes import register_routes
     register_routes(app)
 
+    # Flask CLI management commands (flask resummarize ...)
+    from commands import register_commands
+    register_commands(app)
+
+    # Load models before workers fork (e.g. gunicorn --preload) instead of on first request
+    if env_flag("PRELOAD_MODELS", False):
+        from summarization import warm_up
+        warm_up()
+
     logger.info("App initialized successfully")
@@ -0,0 +1,116 @@
+import io
+import os
+import logging
+import threading
+import subprocess
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+# Samples per block read from ffmpeg's stdout (1 s at 16 kHz)
+DECODE_BLOCK_SAMPLES = int(os.environ.get("DECODE_BLOCK_SAMPLES", "16000"))
+# Bytes per write when feeding a file-like source into ffmpeg's stdin
+FEED_BLOCK_BYTES = 64 * 1024
+
+class AudioDecodeError(Exception):
+    """Raised when ffmpeg cannot decode the input."""
+
+def replayable(audio_source):
+    """
+    Return a function that gives the audio from its start each time it is called.
+
+    Paths and bytes are returned as they are and seekable files are rewound.
+    Other file-like objects are read into memory once; that is the encoded
+    upload, much smaller than its PCM.
+    """
+    if isinstance(audio_source, (str, bytes, bytearray, memoryview)):
+        return lambda: audio_source
+    if audio_source.seekable():
+        start = audio_source.tell()
+
+        def _rewind():
+            audio_source.seek(start)
+            return audio_source
+        return _rewind
+    data = audio_source.read()
+    return lambda: data
+
+def _feed_stdin(source, stdin):
+    try:
+        while True:
+            data = source.read(FEED_BLOCK_BYTES)
+            if not data:
+                break
+            stdin.write(data)
+    except (BrokenPipeError, ValueError, OSError):
+        # ffmpeg exited early; the decode error is reported from its exit status
+        pass
+    finally:
+        try:
+            stdin.close()
+        except OSError:
+            pass
+
+def iter_raw_blocks(audio_source, sample_rate=16000, block_samples=DECODE_BLOCK_SAMPLES):
+    """
+    Decode audio with a single ffmpeg pass, yielding s16le mono PCM in fixed-size blocks.
+
+    Only one block is held at a time, so memory stays bounded regardless of
+    the recording length. Paths are opened by ffmpeg directly; file-like
+    objects and bytes are copied into its stdin in small blocks.
+
+    Args:
+        audio_source (str | file-like | bytes): The audio to decode
+        sample_rate (int): Output sample rate
+        block_samples (int): Samples per yielded block (the last may be shorter)
+
+    Yields:
+        bytes: Raw little-endian 16-bit mono PCM
+    """
+    if isinstance(audio_source, (bytes, bytearray, memoryview)):
+        audio_source = io.BytesIO(audio_source)
+    feed = None if isinstance(audio_source, str) else audio_source
+    command = [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error"]
+    command += ["-nostdin", "-i", audio_source] if feed is None else ["-i", "pipe:0"]
+    command += ["-vn", "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"]
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE if feed is not None else subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stderr_chunks = []
+    threads = [threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)]
+    if feed is not None:
+        threads.append(threading.Thread(target=_feed_stdin, args=(feed, proc.stdin), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    block_bytes = block_samples * 2
+    total = 0
+    finished = False
+    try:
+        while True:
+            data = proc.stdout.read(block_bytes)
+            if not data:
+                break
+            if len(data) % 2:
+                data = data[:-1]
+            total += len(data)
+            yield data
+        finished = True
+    finally:
+        proc.stdout.close()
+        if not finished:
+            # The consumer stopped early, don't decode the rest
+            proc.kill()
+        proc.wait()
+        for thread in threads:
+            thread.join()
+
+    if proc.returncode != 0:
+        message = b"".join(stderr_chunks).decode(errors="ignore").strip()
+        raise AudioDecodeError(f"ffmpeg returned error code {proc.returncode}: {message}")
+    logger.debug(f"Decoded {total // 2 / sample_rate:.1f}s of audio in one ffmpeg pass")
+
+def iter_pcm_blocks(audio_source, sample_rate=16000, block_samples=DECODE_BLOCK_SAMPLES):
+    """Like iter_raw_blocks, but yields int16 NumPy arrays."""
+    for data in iter_raw_blocks(audio_source, sample_rate, block_samples):
+        yield np.frombuffer(data, dtype=np.int16)
@@ -0,0 +1,123 @@
+"""
+Compare the single-parse extractive summarizer against the original implementation.
+
+The original parsed every document twice with the full spaCy pipeline,
+tokenized every sentence with NLTK and, for text without sentence
+punctuation (which is what the speech recognizer returns), re-read the
+stopword corpus for every word. Both implementations run on the same
+generated transcripts and must return identical summaries.
+
+Usage:
+    python benchmarks/bench_extractive.py [--words 1000 10000] [--repeat 3]
+"""
+import argparse
+import os
+import re
+import string
+import sys
+import time
+from heapq import nlargest
+
+import numpy as np
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import summarization  # noqa: E402
+
+VOCABULARY = (
+    "the a of and to in is that it for on with as was at by this we you they be are from or have an "
+    "quantum particle wave function energy measurement physics classical momentum position probability "
+    "experiment theory student lecture example observe system state electron photon field model result "
+    "revenue customer team release support product plan quarter growth meeting review project budget "
+    "um uh like so really very just also then because however therefore"
+).split()
+
+
+def synth_transcript(words, punctuated=True, seed=0):
+    """Return a pseudo-English transcript of roughly the given word count."""
+    rng = np.random.default_rng(seed)
+    sentences = []
+    total = 0
+    while total < words:
+        length = int(rng.integers(6, 25))
+        tokens = list(rng.choice(VOCABULARY, size=length))
+        sentences.append(" ".join(tokens).capitalize() + ("." if punctuated else ""))
+        total += length
+    return " ".join(sentences)
+
+
+def legacy_extractive_summary(nlp, text, max_length=130):
+    """The extractive path as it was before the single-parse rewrite."""
+    doc = nlp(text)
+    # preprocess_text
+    doc2 = nlp(text)
+    sentences = [sent.text.strip() for sent in doc2.sents if sent.text.strip()]
+    if not sentences or len(sentences) == 1 and len(word_tokenize(sentences[0])) > 20:
+        text = re.sub(r'(?<=[.,;!?])\s+', ' ', text)
+        sentences = re.split(r'[.;!?]+', text)
+        sentences = [s.strip() for s in sentences if s.strip() and any(w.lower() not in stopwords.words('english') for w in word_tokenize(s))]
+        if not sentences:
+            words = word_tokenize(text)
+            sentences = [' '.join(words[i:i+15]) for i in range(0, len(words), 15) if any(w.lower() not in stopwords.words('english') for w in words[i:i+15])]
+    stop_words = set(stopwords.words('english'))
+    stop_words.update({'um', 'uh', 'like', 'you know', 'er', 'ah', 'hmm'})
+    for sent in sentences:
+        words = word_tokenize(sent)
+        words = [word for word in words if word not in string.punctuation]
+        words = [word for word in words if word.lower() not in stop_words]
+    # score_sentences
+    valid_sents = [sent for sent in doc.sents if sent.text.strip() in sentences]
+    if not valid_sents:
+        valid_sents = [doc[s.start:s.end] for s in doc.sents if s.text.strip()]
+    tfidf_matrix = TfidfVectorizer().fit_transform([sent.text for sent in valid_sents])
+    scores = tfidf_matrix.sum(axis=1).A1 / tfidf_matrix.sum(axis=1).A1.max()
+    sent_strength = {sent: score for sent, score in zip(valid_sents, scores) if score > 0.05}
+    top_sentences = nlargest(2, sent_strength, key=sent_strength.get)
+    # clean_summary
+    cleaned = []
+    for sent in top_sentences:
+        sent_text = sent.text.strip()
+        for phrase in ['um', 'uh', 'like', 'you know', 'quant mechanics', 'subatomic particl', 'my classical physics practical']:
+            sent_text = sent_text.replace(phrase, '')
+        for err, corr in {'es': 'as', 'col': 'collapse', 'distancas': 'distances', 'Momentum': 'momentum', 'describe': 'describes'}.items():
+            sent_text = sent_text.replace(err, corr)
+        sent_text = ' '.join(sent_text.split())
+        if sent_text:
+            cleaned.append(sent_text)
+    summary = ' '.join(cleaned)
+    return summary[:max_length] + "..." if len(summary) > max_length else summary
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    nlp = summarization.get_nlp()
+    summarization.ensure_nltk()
+    for words in args.words:
+        for punctuated in (True, False):
+            text = synth_transcript(words, punctuated=punctuated)
+            legacy_time, legacy = best_of(lambda: legacy_extractive_summary(nlp, text), args.repeat)
+            new_time, new = best_of(lambda: summarization._extractive_summary(text, 130), args.repeat)
+            label = "punctuated" if punctuated else "unpunctuated"
+            print(f"{words:>6} words {label:>12}: legacy {legacy_time:.3f}s  single-parse {new_time:.3f}s  "
+                  f"speedup {legacy_time / new_time:.1f}x  identical={legacy == new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare segmentation.detect_speech_segments against pydub's split_on_silence.
+
+Both splitters run on the same synthetic speech-plus-silence signals with the
+parameters transcribe_audio uses. Recognition is not involved.
+
+Usage:
+    python benchmarks/bench_segmentation.py [--seconds 60 600 1800] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.silence import split_on_silence
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from segmentation import detect_speech_segments  # noqa: E402
+from transcription import SILENCE_SPLIT_PARAMS  # noqa: E402
+
+
+def synth_samples(seconds, sample_rate=16000, seed=0):
+    """Return int16 mono samples alternating noisy tones with low-level pauses."""
+    rng = np.random.default_rng(seed)
+    pieces = []
+    total = 0
+    while total < seconds * sample_rate:
+        speech_len = int(rng.uniform(0.8, 2.5) * sample_rate)
+        t = np.arange(speech_len) / sample_rate
+        tone = 0.4 * np.sin(2 * np.pi * rng.uniform(200, 900) * t) + 0.05 * rng.standard_normal(speech_len)
+        silence = 0.001 * rng.standard_normal(int(rng.uniform(0.3, 1.2) * sample_rate))
+        pieces.extend([tone, silence])
+        total += speech_len + len(silence)
+    return (np.clip(np.concatenate(pieces), -1, 1) * 32767).astype(np.int16)
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--seconds', type=int, nargs='+', default=[60, 600])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for seconds in args.seconds:
+        samples = synth_samples(seconds)
+        segment = AudioSegment(samples.tobytes(), frame_rate=16000, sample_width=2, channels=1)
+
+        numpy_time, bounds = best_of(lambda: detect_speech_segments(samples, 16000, **SILENCE_SPLIT_PARAMS), args.repeat)
+        pydub_time, chunks = best_of(lambda: split_on_silence(segment, **SILENCE_SPLIT_PARAMS), 1)
+        print(f"{seconds:>6}s audio: pydub {pydub_time:8.3f}s ({len(chunks)} chunks)  "
+              f"numpy {numpy_time:8.4f}s ({len(bounds)} chunks)  speedup {pydub_time / numpy_time:,.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Compare summarizer runtimes: the PyTorch pipeline against ONNX and int8 variants.
+
+Every variant summarizes the same documents. Reported per variant:
+single-document latency, batched throughput, and ROUGE-1/2/L F1 of its
+summaries against the PyTorch summaries (drift, 1.0 means identical).
+
+Usage:
+    python benchmarks/bench_summarizer_variants.py --onnx-path models/distilbart-onnx \
+        [--variants pytorch onnx int8] [--input transcript1.txt ...] [--batch-size 4] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from summarization import load_summarizer_variant  # noqa: E402
+
+SAMPLE_DOCUMENTS = [
+    "Today we are going to talk about quantum mechanics and how it differs from classical physics. "
+    "In classical physics, objects have well defined positions and momenta at all times. "
+    "Quantum mechanics instead describes particles with a wave function that gives the probability "
+    "of finding the particle in a given place. When we measure the particle, the wave function "
+    "collapses and we observe a definite value. This idea was very controversial when it was first "
+    "proposed, and many famous physicists including Einstein argued against it for decades.",
+    "The quarterly review covered three topics. First, revenue grew by twelve percent compared to the "
+    "same quarter last year, mostly driven by the new subscription plans. Second, support tickets went "
+    "down after the redesign of the onboarding flow, although response times are still above our target. "
+    "Third, the team agreed to postpone the mobile release by two weeks so that the remaining payment "
+    "bugs can be fixed. Action items were assigned to each lead and will be reviewed next Monday.",
+    "Photosynthesis is the process plants use to turn light into chemical energy. It happens in the "
+    "chloroplasts, which contain the green pigment chlorophyll. During the light dependent reactions, "
+    "water is split and oxygen is released, while energy is stored in ATP and NADPH. In the Calvin cycle "
+    "that energy is used to fix carbon dioxide into sugars. Without photosynthesis there would be almost "
+    "no oxygen in the atmosphere and most food chains on Earth would not exist.",
+]
+
+
+def ngrams(tokens, n):
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def f1(overlap, candidate_total, reference_total):
+    if not overlap or not candidate_total or not reference_total:
+        return 0.0
+    precision, recall = overlap / candidate_total, overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(candidate, reference, n):
+    cand, ref = ngrams(candidate, n), ngrams(reference, n)
+    return f1(sum((cand & ref).values()), sum(cand.values()), sum(ref.values()))
+
+
+def rouge_l(candidate, reference):
+    # Longest common subsequence over tokens
+    previous = [0] * (len(reference) + 1)
+    for token in candidate:
+        current = [0]
+        for j, ref_token in enumerate(reference):
+            current.append(previous[j] + 1 if token == ref_token else max(previous[j + 1], current[j]))
+        previous = current
+    return f1(previous[-1], len(candidate), len(reference))
+
+
+def rouge(candidate, reference):
+    candidate, reference = candidate.lower().split(), reference.lower().split()
+    return rouge_n(candidate, reference, 1), rouge_n(candidate, reference, 2), rouge_l(candidate, reference)
+
+
+def run(summarizer, documents, batch_size, max_length):
+    outputs = summarizer(documents, max_length=max_length, min_length=30, do_sample=False,
+                         truncation=True, batch_size=batch_size)
+    return [output['summary_text'] for output in outputs]
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variants", nargs="+", default=["pytorch", "onnx", "int8"])
+    parser.add_argument("--onnx-path", help="Directory of the exported ONNX model")
+    parser.add_argument("--int8-path", help="Local model directory to quantize (defaults to the hub model)")
+    parser.add_argument("--input", nargs="*", help="Text files, one document each")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--max-length", type=int, default=130)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    documents = SAMPLE_DOCUMENTS
+    if args.input:
+        documents = []
+        for path in args.input:
+            with open(path) as f:
+                documents.append(f.read().strip().replace('\n', ' '))
+    paths = {"onnx": args.onnx_path, "int8": args.int8_path}
+
+    reference = None
+    print(f"{len(documents)} documents, batch size {args.batch_size}")
+    for variant in ["pytorch"] + [v for v in args.variants if v != "pytorch"]:
+        started = time.perf_counter()
+        try:
+            summarizer = load_summarizer_variant(variant, paths.get(variant))
+        except Exception as e:
+            print(f"{variant:>8}: could not load ({e})")
+            continue
+        load_seconds = time.perf_counter() - started
+        run(summarizer, documents[:1], 1, args.max_length)  # warm-up
+
+        latency, _ = best_of(lambda: run(summarizer, documents[:1], 1, args.max_length), args.repeat)
+        batch_seconds, summaries = best_of(lambda: run(summarizer, documents, args.batch_size, args.max_length), args.repeat)
+        if variant == "pytorch":
+            reference = summaries
+        line = (f"{variant:>8}: load {load_seconds:.1f}s  latency {latency * 1000:.0f} ms/doc  "
+                f"throughput {len(documents) / batch_seconds:.2f} docs/s")
+        if reference is not None and variant != "pytorch":
+            scores = [rouge(candidate, ref) for candidate, ref in zip(summaries, reference)]
+            means = [sum(column) / len(column) for column in zip(*scores)]
+            line += f"  ROUGE-1 {means[0]:.3f}  ROUGE-2 {means[1]:.3f}  ROUGE-L {means[2]:.3f} vs pytorch"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
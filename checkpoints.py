@@ -0,0 +1,76 @@
+import logging
+from app import db
+from models import TranscriptionCheckpoint
+from transcription import transcribe_stream
+
+logger = logging.getLogger(__name__)
+
+def load_checkpoints(request_id, audio_key):
+    """
+    Return the checkpoint rows of a request, ordered by chunk index.
+
+    Rows recorded for different audio under the same request_id are stale and
+    are discarded.
+    """
+    rows = TranscriptionCheckpoint.query.filter_by(request_id=request_id).order_by(TranscriptionCheckpoint.chunk_index).all()
+    if rows and any(row.audio_key != audio_key for row in rows):
+        logger.warning(f"Discarding checkpoints of request {request_id} recorded for different audio")
+        clear_checkpoints(request_id)
+        return []
+    return rows
+
+def clear_checkpoints(request_id):
+    """Delete all checkpoint rows of a request."""
+    TranscriptionCheckpoint.query.filter_by(request_id=request_id).delete()
+    db.session.commit()
+
+def transcribe_resumable(audio_source, request_id, audio_key, noise_reduction=True, max_workers=None, backend=None):
+    """
+    Transcribe audio with bounded memory, checkpointing each chunk under request_id.
+
+    The audio is streamed through transcription.transcribe_stream and every
+    chunk is recorded as soon as it is recognized. The incremental segmenter
+    closes the same chunks for the same audio, so a repeated call for the
+    request only recognizes chunks without a done checkpoint, and a crash or
+    a recognizer outage late in a long recording costs a small redo.
+
+    Args:
+        audio_source (str | file-like | bytes): The audio to transcribe
+        request_id (str): Job identifier the checkpoints are stored under
+        audio_key (str): Content hash of the audio (see transcript_cache.cache_key)
+        noise_reduction (bool): Whether to apply the bandpass filter
+        max_workers (int): Per-request recognition concurrency
+        backend (RecognizerBackend): Recognition engine
+
+    Returns:
+        tuple[list[str], int]: Text per chunk in order and the number of chunks
+            that failed
+    """
+    rows = {row.chunk_index: row for row in load_checkpoints(request_id, audio_key)}
+    done = {index: (row.start_sample, row.end_sample, row.chunk_text or "")
+            for index, row in rows.items() if row.status == 'done'}
+    if rows:
+        logger.info(f"Resuming request {request_id} from checkpoint: {len(done)}/{len(rows)} chunks done")
+    failed = 0
+
+    def _checkpoint(index, start, end, text, chunk_failed):
+        nonlocal failed
+        row = rows.get(index)
+        if row is None:
+            row = rows[index] = TranscriptionCheckpoint(request_id=request_id, audio_key=audio_key, chunk_index=index)
+            db.session.add(row)
+        row.start_sample, row.end_sample = int(start), int(end)
+        row.chunk_text = text
+        row.status = 'failed' if chunk_failed else 'done'
+        failed += bool(chunk_failed)
+        db.session.commit()
+
+    texts = transcribe_stream(audio_source, noise_reduction=noise_reduction, max_workers=max_workers,
+                              backend=backend, done=done, on_chunk=_checkpoint)
+    # Rows beyond the last chunk were recorded under different segmentation settings
+    stale = [row for index, row in rows.items() if index >= len(texts)]
+    if stale:
+        for row in stale:
+            db.session.delete(row)
+        db.session.commit()
+    return texts, failed
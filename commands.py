@@ -0,0 +1,108 @@
+import time
+import logging
+import click
+import threading
+from collections import deque
+from itertools import chain
+from sqlalchemy import update
+from app import db
+from models import Transcription
+from summarization import generate_summary, extractive_summaries
+from jobs import JOB_WORKERS, start_workers
+
+logger = logging.getLogger(__name__)
+
+def _transcription_batches(user_id=None, batch_size=100):
+    """Yield lists of (id, transcription_text), walking the table by id so memory stays bounded."""
+    last_id = 0
+    while True:
+        query = db.session.query(Transcription.id, Transcription.transcription_text).filter(Transcription.id > last_id)
+        if user_id is not None:
+            query = query.filter(Transcription.user_id == user_id)
+        rows = query.order_by(Transcription.id).limit(batch_size).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+def resummarize(user_id=None, method="extractive", batch_size=100, max_length=130, n_process=1, dry_run=False,
+                pipe_batch_size=None):
+    """
+    Regenerate summary_text of stored transcriptions with bounded memory.
+
+    All rows flow lazily through one summarizer, so with the extractive
+    method a single nlp.pipe (and its n_process workers) serves the whole
+    run. Summaries are written back every batch_size rows as they are yielded.
+
+    Args:
+        user_id (int): Only this user's transcriptions, or all when None
+        method (str): "extractive" (nlp.pipe batches) or "auto" (generate_summary)
+        batch_size (int): Rows per database page and per committed update
+        max_length (int): Summary length limit passed to the summarizer
+        n_process (int): spaCy processes for the extractive method
+        dry_run (bool): Summarize without writing
+        pipe_batch_size (int): Documents per nlp.pipe batch, defaults to EXTRACTIVE_BATCH_SIZE
+
+    Returns:
+        int: Number of transcriptions re-summarized
+    """
+    ids = deque()  # ids of the texts handed to the summarizer, in order
+
+    def _texts():
+        for row in chain.from_iterable(_transcription_batches(user_id, batch_size)):
+            ids.append(row.id)
+            yield row.transcription_text or ""
+
+    if method == "extractive":
+        summaries = extractive_summaries(_texts(), max_length=max_length, batch_size=pipe_batch_size, n_process=n_process)
+    else:
+        summaries = (generate_summary(text, max_length=max_length) for text in _texts())
+
+    total = 0
+    started = time.perf_counter()
+    values = []
+    for summary in summaries:
+        values.append({"id": ids.popleft(), "summary_text": summary})
+        if len(values) >= batch_size:
+            total += _write_summaries(values, dry_run)
+            values = []
+            logger.info(f"Re-summarized {total} transcriptions ({time.perf_counter() - started:.1f}s)")
+    if values:
+        total += _write_summaries(values, dry_run)
+        logger.info(f"Re-summarized {total} transcriptions ({time.perf_counter() - started:.1f}s)")
+    return total
+
+def _write_summaries(values, dry_run):
+    if not dry_run:
+        db.session.execute(update(Transcription), values)
+        db.session.commit()
+    return len(values)
+
+def register_commands(app):
+
+    @app.cli.command("resummarize")
+    @click.option("--user-id", type=int, default=None, help="Only re-summarize this user's transcriptions.")
+    @click.option("--method", type=click.Choice(["extractive", "auto"]), default="extractive", show_default=True,
+                  help="extractive: batched spaCy pipeline; auto: transformer with extractive fallback.")
+    @click.option("--batch-size", type=int, default=100, show_default=True, help="Rows per database page and update.")
+    @click.option("--pipe-batch-size", type=int, default=None,
+                  help="Documents per spaCy batch (extractive only), defaults to EXTRACTIVE_BATCH_SIZE.")
+    @click.option("--max-length", type=int, default=130, show_default=True)
+    @click.option("--n-process", type=int, default=1, show_default=True, help="spaCy processes (extractive only).")
+    @click.option("--dry-run", is_flag=True, help="Summarize without saving.")
+    def resummarize_command(user_id, method, batch_size, pipe_batch_size, max_length, n_process, dry_run):
+        """Regenerate stored summaries in bounded-memory batches."""
+        total = resummarize(user_id=user_id, method=method, batch_size=batch_size, max_length=max_length,
+                            n_process=n_process, dry_run=dry_run, pipe_batch_size=pipe_batch_size)
+        click.echo(f"Re-summarized {total} transcriptions{' (dry run)' if dry_run else ''}")
+
+    @app.cli.command("run-jobs")
+    @click.option("--workers", type=int, default=max(JOB_WORKERS, 1), show_default=True, help="Worker threads.")
+    def run_jobs_command(workers):
+        """Run queued transcription jobs until interrupted."""
+        start_workers(app, workers)
+        click.echo(f"Running transcription jobs with {workers} workers, Ctrl+C to stop")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
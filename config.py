@@ -0,0 +1,22 @@
+import os
+
+FALSE_VALUES = ("0", "false", "no", "off")
+
+def env_flag(name, default):
+    """
+    Read an on/off setting from the environment.
+
+    "0", "false", "no" and "off" (any case) turn it off, any other value turns
+    it on, and an unset or empty variable gives default.
+
+    Args:
+        name (str): Environment variable
+        default (bool): Value when the variable is not set
+
+    Returns:
+        bool: The setting
+    """
+    value = os.environ.get(name, "").strip().lower()
+    if not value:
+        return default
+    return value not in FALSE_VALUES
@@ -0,0 +1,26 @@
+import threading
+
+class HitCounters:
+    """
+    Thread-safe hit/miss counters of a process-local cache.
+
+    Every counter starts at 0; hits and misses are always present so the hit
+    rate can be reported.
+    """
+
+    def __init__(self, *names):
+        self._counts = dict.fromkeys(("hits", "misses") + names, 0)
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self, **extra):
+        """Return the counters, any extra fields (e.g. size) and the hit rate."""
+        with self._lock:
+            stats = dict(self._counts)
+        stats.update(extra)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
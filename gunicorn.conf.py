@@ -0,0 +1,10 @@
+# gunicorn settings, picked up automatically from the working directory
+
+
+def post_worker_init(worker):
+    # Job worker threads belong to the serving processes. Starting them here
+    # rather than on import keeps them out of the master, which may have
+    # loaded the app before forking (--preload), where threads don't survive.
+    from app import app
+    from jobs import start_serving_workers
+    start_serving_workers(app)
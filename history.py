@@ -0,0 +1,69 @@
+import os
+import logging
+import datetime
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import load_only
+from app import db
+from models import Transcription
+
+logger = logging.getLogger(__name__)
+
+# Transcriptions per page of the dashboard history
+HISTORY_PAGE_SIZE = int(os.environ.get("HISTORY_PAGE_SIZE", "50"))
+HISTORY_MAX_PAGE_SIZE = 200
+
+def encode_cursor(transcription):
+    """Return the keyset cursor pointing just past a listed transcription."""
+    return f"{transcription.created_at.isoformat()}_{transcription.id}"
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor made by encode_cursor.
+
+    Returns:
+        tuple[datetime.datetime, int] | None: (created_at, id), or None if the cursor is malformed
+    """
+    try:
+        created_at, _, transcription_id = (cursor or '').rpartition('_')
+        return datetime.datetime.fromisoformat(created_at), int(transcription_id)
+    except ValueError:
+        return None
+
+def list_transcriptions(user_id, before=None, limit=HISTORY_PAGE_SIZE):
+    """
+    One page of a user's transcriptions, newest first.
+
+    Pages are addressed by keyset cursor on (created_at, id) rather than by
+    offset, so every page is a short range scan of the
+    (user_id, created_at, id) index however many transcriptions the user
+    has. Only the columns the list shows are loaded; the transcript and
+    summary text stay in the database.
+
+    Args:
+        user_id (int): Owner of the transcriptions
+        before (str): Cursor of the last row of the previous page, None for the first page
+        limit (int): Rows per page, capped at HISTORY_MAX_PAGE_SIZE
+
+    Returns:
+        tuple[list[Transcription], str | None]: The rows and the cursor of
+            the next page, or None on the last page
+    """
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    query = (Transcription.query
+             .options(load_only(Transcription.id, Transcription.title, Transcription.created_at))
+             .filter(Transcription.user_id == user_id))
+    position = decode_cursor(before) if before else None
+    if position is not None:
+        query = query.filter(tuple_(Transcription.created_at, Transcription.id) < position)
+    # One extra row tells whether there is a next page
+    rows = query.order_by(Transcription.created_at.desc(), Transcription.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def count_transcriptions(user_id):
+    """Return how many transcriptions a user has, counted in the database."""
+    return db.session.query(func.count(Transcription.id)).filter(Transcription.user_id == user_id).scalar()
+
+def default_title(user_id, prefix="Transcription"):
+    """Return the numbered title given to untitled uploads, e.g. "Recording 12"."""
+    return f"{prefix} {count_transcriptions(user_id) + 1}"
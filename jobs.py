@@ -0,0 +1,367 @@
+import io
+import os
+import time
+import shutil
+import logging
+import tempfile
+import datetime
+import threading
+import traceback
+from uuid import UUID, uuid4
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from flask import current_app
+from werkzeug.utils import secure_filename
+from app import db
+from config import env_flag
+from models import Transcription, TranscriptionJob
+from transcription import transcribe_audio, IN_MEMORY_PIPELINE
+from transcript_cache import transcribe_with_cache, IncompleteTranscriptionError
+from checkpoints import clear_checkpoints
+from summary_upgrade import summarize_within_deadline, schedule_upgrade
+
+logger = logging.getLogger(__name__)
+
+# Worker threads per process that run queued jobs. 0 runs every job inside
+# the request that submitted it, as before the queue existed.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# How often idle workers look for new jobs submitted by other processes
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "2"))
+# Running jobs refresh their updated_at this often, however long a stage takes
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("JOB_HEARTBEAT_SECONDS", "30"))
+# A running job without a heartbeat for this long is assumed to have lost its
+# worker (crash, restart) and is run again
+JOB_STALE_SECONDS = int(os.environ.get("JOB_STALE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+# Start the workers in web server processes (gunicorn.conf.py, main.py).
+# Set to 0 when jobs are run by separate `flask run-jobs` processes instead.
+# Importing the app never starts them, so CLI commands and a preloading
+# gunicorn master don't claim jobs.
+JOB_WORKERS_AUTOSTART = env_flag("JOB_WORKERS_AUTOSTART", True)
+
+NO_SPEECH = 'No speech could be recognized in the audio file.'
+
+_wakeup = threading.Event()
+_workers = []
+_workers_lock = threading.Lock()
+
+def _now():
+    return datetime.datetime.utcnow()
+
+def queue_enabled():
+    return JOB_WORKERS > 0
+
+def parse_request_id(value):
+    """Return the canonical form of a client-supplied UUID request_id, or None if it is not one."""
+    try:
+        return str(UUID(str(value)))
+    except (TypeError, ValueError):
+        return None
+
+def can_resubmit(job):
+    """Whether a job may be submitted again: it failed, or the transcription it produced was deleted."""
+    return job.status == 'failed' or (job.status == 'done' and job.transcription_id is None)
+
+def existing_submission(user_id, request_id):
+    """
+    Return what an earlier submission under request_id produced.
+
+    Returns:
+        TranscriptionJob | Transcription | None: The job unless it can be
+            submitted again (see can_resubmit), else a transcription saved
+            without a job, e.g. by a finished live stream
+    """
+    job = get_job(request_id, user_id)
+    if job is not None and not can_resubmit(job):
+        return job
+    return Transcription.query.filter_by(user_id=user_id, request_id=request_id).first()
+
+def _requeue(job, audio):
+    previous = job.status
+    job.audio = audio if queue_enabled() else None
+    job.status, job.stage, job.error, job.attempts = 'queued', 'queued', None, 0
+    job.finished_at = None
+    job.updated_at = _now()
+    db.session.commit()
+    logger.info(f"Resubmitted {previous} job {job.request_id}")
+
+def submit_job(user_id, title, audio, filename=None, noise_reduction=True, request_id=None):
+    """
+    Record a transcription job and hand it to the workers.
+
+    A request_id that already has a job returns that job instead of queuing
+    the audio again; only a failed job, or one whose transcription was
+    deleted, is run again with the new audio.
+    With JOB_WORKERS=0 the job runs before this returns.
+
+    Args:
+        user_id (int): Owner of the resulting transcription
+        title (str): Title of the resulting transcription
+        audio (bytes): The uploaded audio container
+        filename (str): Original file name, used by the file-based pipeline
+        noise_reduction (bool): Whether to apply the bandpass filter
+        request_id (str): Job id, generated when omitted
+
+    Returns:
+        TranscriptionJob: The committed job
+    """
+    job = get_job(request_id, user_id) if request_id else None
+    if job is not None and not can_resubmit(job):
+        logger.info(f"Job {request_id} was already submitted, it is {job.status}")
+        return job
+    if job is not None:
+        _requeue(job, audio)
+    else:
+        job = TranscriptionJob(request_id=request_id or str(uuid4()), user_id=user_id, title=title, filename=filename,
+                               noise_reduction=noise_reduction, status='queued', stage='queued', attempts=0,
+                               audio=audio if queue_enabled() else None)
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent submission of the same request_id won the insert
+            db.session.rollback()
+            logger.info(f"Job {request_id} was submitted concurrently")
+            return get_job(request_id, user_id)
+        logger.info(f"Submitted job {job.request_id} for user {user_id}: {len(audio)} bytes")
+    if queue_enabled():
+        _wakeup.set()
+    else:
+        job.attempts, job.status, job.started_at = 1, 'running', _now()
+        run_job(job, audio)
+    return job
+
+def get_job(request_id, user_id):
+    """Return a user's job, or None."""
+    return TranscriptionJob.query.filter_by(request_id=request_id, user_id=user_id).first()
+
+def job_status(job):
+    """Return the client-facing state of a job."""
+    return {
+        'job_id': job.request_id,
+        'status': job.status,
+        'stage': job.stage,
+        'error': job.error,
+        'id': job.transcription_id,
+        'attempts': job.attempts,
+    }
+
+def job_stats():
+    """Return the number of jobs per status and the worker threads of this process."""
+    counts = dict(db.session.query(TranscriptionJob.status, func.count(TranscriptionJob.id))
+                  .group_by(TranscriptionJob.status).all())
+    with _workers_lock:
+        alive = sum(worker.is_alive() for worker in _workers)
+    return {'counts': counts, 'workers': alive}
+
+def _set_stage(job, stage):
+    job.stage = stage
+    job.updated_at = _now()
+    db.session.commit()
+    logger.info(f"Job {job.request_id}: {stage}")
+
+def _transcribe(job, audio):
+    if IN_MEMORY_PIPELINE:
+        # Chunk results are checkpointed under the job id, so a job that is
+        # picked up again after a restart only recognizes the missing chunks
+        return transcribe_with_cache(io.BytesIO(audio), noise_reduction=job.noise_reduction, request_id=job.request_id)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        file_path = os.path.join(temp_dir, secure_filename(job.filename or '') or 'recording.webm')
+        with open(file_path, 'wb') as f:
+            f.write(audio)
+        return transcribe_audio(file_path, noise_reduction=job.noise_reduction)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def _finish(job, status, stage, error=None):
+    job.status, job.stage, job.error = status, stage, error
+    job.audio = None
+    job.finished_at = job.updated_at = _now()
+    db.session.commit()
+    if status == 'failed':
+        # No attempt will resume from the chunks recognized so far
+        clear_checkpoints(job.request_id)
+
+def run_job(job, audio=None):
+    """
+    Run the transcribe, summarize and save pipeline of a claimed job.
+
+    Failures are recorded on the job. Failed chunks and unexpected errors put
+    it back in the queue until JOB_MAX_ATTEMPTS is reached.
+
+    Args:
+        job (TranscriptionJob): A job in the running state
+        audio (bytes): The audio, read from the job row when omitted
+
+    Returns:
+        bool: Whether the job is done
+    """
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(current_app._get_current_object(), job.id, stop),
+                                 name=f"job-heartbeat-{job.id}", daemon=True)
+    heartbeat.start()
+    try:
+        return _run_job(job, audio)
+    finally:
+        stop.set()
+
+def _heartbeat(app, job_id, stop):
+    # Keeps a running job from looking stale while one stage takes long; uses its own session
+    while not stop.wait(JOB_HEARTBEAT_SECONDS):
+        with app.app_context():
+            try:
+                TranscriptionJob.query.filter_by(id=job_id, status='running') \
+                    .update({'updated_at': _now()}, synchronize_session=False)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"Heartbeat of job {job_id} failed: {str(e)}")
+            finally:
+                db.session.remove()
+
+def _run_job(job, audio):
+    started = time.perf_counter()
+    try:
+        if audio is None:
+            audio = job.audio
+        if not audio:
+            _finish(job, 'failed', 'failed', 'The uploaded audio is no longer available.')
+            return False
+
+        _set_stage(job, 'transcribing')
+        # Decoder, recognizer and database errors raise and are retried below.
+        # An empty transcript means there was no speech, which a retry won't change.
+        transcription_text = _transcribe(job, audio)
+        if not transcription_text:
+            logger.warning(f"Job {job.request_id}: {NO_SPEECH}")
+            _finish(job, 'failed', 'failed', NO_SPEECH)
+            return False
+
+        _set_stage(job, 'summarizing')
+        summary, degraded = summarize_within_deadline(transcription_text)
+
+        transcription = Transcription(title=job.title, transcription_text=transcription_text, summary_text=summary,
+                                      user_id=job.user_id, request_id=job.request_id)
+        db.session.add(transcription)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # The same recording was saved meanwhile, e.g. by its live stream
+            db.session.rollback()
+            transcription = Transcription.query.filter_by(user_id=job.user_id, request_id=job.request_id).one()
+            degraded = False
+        job.transcription_id = transcription.id
+        _finish(job, 'done', 'done')
+        logger.info(f"Job {job.request_id} done in {time.perf_counter() - started:.1f}s: transcription {transcription.id}")
+        if degraded:
+            schedule_upgrade(transcription.id, transcription_text, summary)
+        return True
+    except IncompleteTranscriptionError as e:
+        # The recognized chunks are checkpointed, the next attempt only redoes the failed ones
+        db.session.rollback()
+        logger.warning(f"Job {job.request_id} incomplete: {str(e)}")
+        _retry_or_fail(job, e)
+        return False
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Job {job.request_id} failed: {str(e)} with traceback: {traceback.format_exc()}")
+        _retry_or_fail(job, e)
+        return False
+
+def _retry_or_fail(job, error):
+    # Put the job back in the queue until JOB_MAX_ATTEMPTS, then mark it failed
+    retry = queue_enabled() and job.attempts < JOB_MAX_ATTEMPTS
+    try:
+        job.status = 'queued' if retry else 'failed'
+        job.stage = 'queued' if retry else 'failed'
+        job.error = f'Error processing audio: {str(error)}'
+        job.updated_at = _now()
+        if not retry:
+            job.audio = None
+            job.finished_at = job.updated_at
+        db.session.commit()
+        if not retry:
+            clear_checkpoints(job.request_id)
+    except Exception:
+        db.session.rollback()
+        logger.error(f"Could not record the failure of job {job.request_id}: {traceback.format_exc()}")
+
+def _claimable():
+    stale_before = _now() - datetime.timedelta(seconds=JOB_STALE_SECONDS)
+    return or_(TranscriptionJob.status == 'queued',
+               and_(TranscriptionJob.status == 'running', TranscriptionJob.updated_at < stale_before))
+
+def claim_job():
+    """
+    Atomically move the oldest runnable job to running.
+
+    Queued jobs are runnable, and so are running jobs whose worker stopped
+    updating them. The conditional UPDATE lets several processes poll the
+    same table without taking a job twice.
+
+    Returns:
+        TranscriptionJob | None: The claimed job
+    """
+    while True:
+        job_id = db.session.query(TranscriptionJob.id).filter(_claimable()) \
+            .order_by(TranscriptionJob.created_at, TranscriptionJob.id).limit(1).scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+        now = _now()
+        claimed = TranscriptionJob.query.filter(TranscriptionJob.id == job_id, _claimable()).update(
+            {'status': 'running', 'stage': 'starting', 'attempts': TranscriptionJob.attempts + 1,
+             'started_at': now, 'updated_at': now},
+            synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            continue  # another worker was faster
+        job = db.session.get(TranscriptionJob, job_id)
+        if job.attempts > JOB_MAX_ATTEMPTS:
+            logger.error(f"Job {job.request_id} gave up after {JOB_MAX_ATTEMPTS} attempts")
+            _finish(job, 'failed', 'failed', job.error or f'Gave up after {JOB_MAX_ATTEMPTS} attempts.')
+            continue
+        return job
+
+def work(app, stop=None):
+    """
+    Claim and run jobs until stop is set.
+
+    Args:
+        app (Flask): The application, for the database session
+        stop (threading.Event): Ends the loop once set; runs forever when None
+    """
+    while stop is None or not stop.is_set():
+        with app.app_context():
+            try:
+                job = claim_job()
+                if job is not None:
+                    logger.info(f"Running job {job.request_id} (attempt {job.attempts})")
+                    run_job(job)
+                    continue
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Job worker error: {str(e)}")
+            finally:
+                db.session.remove()
+        _wakeup.wait(JOB_POLL_SECONDS)
+        _wakeup.clear()
+
+def start_serving_workers(app):
+    """Start the job workers of a web server process, unless JOB_WORKERS_AUTOSTART is off."""
+    if JOB_WORKERS_AUTOSTART:
+        start_workers(app)
+
+def start_workers(app, count=None):
+    """Make sure this process runs count job worker threads (JOB_WORKERS by default)."""
+    count = JOB_WORKERS if count is None else count
+    with _workers_lock:
+        started = 0
+        for index in range(len(_workers), count):
+            worker = threading.Thread(target=work, args=(app,), name=f"job-worker-{index}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+            started += 1
+    if started:
+        logger.info(f"Started {started} job workers, polling every {JOB_POLL_SECONDS}s")
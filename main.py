@@ -1,9 +1,14 @@
+import os
 from app import app
+from jobs import start_serving_workers
 
 if __name__ == "__main__":
+    # With the reloader only the child process serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_serving_workers(app)
     app.run(
         host="0.0.0.0", 
         port=5000, 
         debug=True,
         ssl_context=('ssl/cert.pem', 'ssl/key.pem')
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,38 @@
+"""unique transcription request_id per user
+
+Revision ID: b6e05d3f9a12
+Revises: e3b7a1c95f20
+Create Date: 2026-10-17 18:36:52.207714
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e05d3f9a12'
+down_revision = 'e3b7a1c95f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Older clients sent a per-page counter as request_id, so the same value
+    # repeats; keep it on the first row of each user and clear the rest
+    op.execute("""
+        UPDATE transcription SET request_id = NULL
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (PARTITION BY user_id, request_id ORDER BY id) AS n
+                FROM transcription WHERE request_id IS NOT NULL
+            ) AS duplicates
+            WHERE n > 1
+        )
+    """)
+    with op.batch_alter_table('transcription', schema=None) as batch_op:
+        batch_op.create_index('ix_transcription_user_request', ['user_id', 'request_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('transcription', schema=None) as batch_op:
+        batch_op.drop_index('ix_transcription_user_request')
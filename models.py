@@ -1,13 +1,16 @@
 import datetime
 from app import db, login_manager
 from flask_login import UserMixin
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from werkzeug.security import generate_password_hash, check_password_hash
 import uuid  # Add this import for generating unique request IDs
 
 # Flask-Login user loader
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Served from a short-lived per-process cache, see user_cache
+    from user_cache import get_user
+    return get_user(int(user_id))
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -29,6 +32,13 @@ class User(UserMixin, db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
+# Title ranks above summary, summary above the transcript body
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(summary_text, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(transcription_text, '')), 'C')"
+)
+
 class Transcription(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False, default="Untitled Transcription")
@@ -36,9 +46,93 @@ class Transcription(db.Model):
     summary_text = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     request_id = db.Column(db.String(50), nullable=True, default=lambda: str(uuid.uuid4()))  # New column
+    # Full-text search document maintained by PostgreSQL on every insert and update
+    search_vector = db.deferred(db.Column(TSVECTOR, db.Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True))
     
     # Foreign key linking to User
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_transcription_search', 'user_id', 'search_vector', postgresql_using='gin'),
+        # A submission is processed once per user; repeats are answered with the stored result
+        db.Index('ix_transcription_user_request', 'user_id', 'request_id', unique=True),
+        # Dashboard history: newest first per user, id breaks created_at ties
+        db.Index('ix_transcription_user_created_at', 'user_id', 'created_at', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<Transcription {self.title}>'
+
+class TranscriptCache(db.Model):
+    """Transcripts keyed by a hash of the normalized 16 kHz mono PCM they came from."""
+    key = db.Column(db.String(64), primary_key=True)
+    transcript_text = db.Column(db.Text, nullable=False)
+    chunk_texts = db.Column(db.Text, nullable=True)  # JSON list, one entry per chunk
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<TranscriptCache {self.key[:12]}>'
+
+
+class TranscriptionCheckpoint(db.Model):
+    """Per-chunk recognition result of an in-progress transcription, keyed by request_id."""
+    id = db.Column(db.Integer, primary_key=True)
+    request_id = db.Column(db.String(50), nullable=False, index=True)
+    audio_key = db.Column(db.String(64), nullable=False)  # TranscriptCache key of the audio
+    chunk_index = db.Column(db.Integer, nullable=False)
+    start_sample = db.Column(db.Integer, nullable=False)
+    end_sample = db.Column(db.Integer, nullable=False)
+    chunk_text = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(16), nullable=False, default='pending')  # pending, done or failed
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('request_id', 'chunk_index'),)
+
+    def __repr__(self):
+        return f'<TranscriptionCheckpoint {self.request_id}#{self.chunk_index} {self.status}>'
+
+
+class SummaryCache(db.Model):
+    """Summaries keyed by a hash of the normalized text and the settings that produced them."""
+    key = db.Column(db.String(64), primary_key=True)
+    summary_text = db.Column(db.Text, nullable=False)
+    method = db.Column(db.String(32), nullable=False)  # transformer or extractive
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<SummaryCache {self.key[:12]} {self.method}>'
+
+
+class TranscriptionJob(db.Model):
+    """A queued transcribe-and-summarize run. request_id doubles as the job id and ends up on the Transcription."""
+    id = db.Column(db.Integer, primary_key=True)
+    request_id = db.Column(db.String(50), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    title = db.Column(db.String(100), nullable=False)
+    filename = db.Column(db.String(255), nullable=True)
+    noise_reduction = db.Column(db.Boolean, nullable=False, default=True)
+    # Uploaded audio, cleared once the job has finished
+    audio = db.deferred(db.Column(db.LargeBinary, nullable=True))
+    status = db.Column(db.String(16), nullable=False, default='queued')  # queued, running, done or failed
+    stage = db.Column(db.String(32), nullable=False, default='queued')  # current pipeline step
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    transcription_id = db.Column(db.Integer, db.ForeignKey('transcription.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    # Refreshed at every stage change; running jobs that stop updating are picked up again
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'request_id'),
+        db.Index('ix_transcription_job_status_created_at', 'status', 'created_at'),
+    )
+
     def __repr__(self):
-        return f'<Transcription {self.title}>'
\ No newline at end of file
+        return f'<TranscriptionJob {self.request_id} {self.status}/{self.stage}>'
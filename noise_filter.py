@@ -0,0 +1,116 @@
+import logging
+from functools import lru_cache
+import numpy as np
+from scipy.signal import butter, sosfilt
+
+logger = logging.getLogger(__name__)
+
+# Speech typically lies between 300Hz-3400Hz
+SPEECH_BAND = (300, 3400)
+FILTER_ORDER = 4
+# Frames filtered per sosfilt call, bounds the float32 working set
+BLOCK_FRAMES = 65536
+SAMPLE_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+# 24-bit samples have no NumPy dtype; they are filtered as int32 in this range
+INT24_RANGE = (-(1 << 23), (1 << 23) - 1)
+
+def unpack_int24(data):
+    """Unpack little-endian 24-bit PCM bytes into sign-extended int32 samples."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    raw = raw[:len(raw) - len(raw) % 3].reshape(-1, 3).astype(np.int32)
+    samples = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+    return (samples << 8) >> 8
+
+def pack_int24(samples):
+    """Pack int32 samples in the 24-bit range into little-endian 24-bit PCM, as a uint8 array."""
+    return np.ascontiguousarray(np.asarray(samples, dtype='<i4').view(np.uint8).reshape(-1, 4)[:, :3]).reshape(-1)
+
+@lru_cache(maxsize=32)
+def bandpass_sos(sample_rate, band=SPEECH_BAND, order=FILTER_ORDER):
+    """
+    Design (once per sample rate and band) a Butterworth bandpass filter.
+
+    Args:
+        sample_rate (int): Sample rate of the audio
+        band (tuple): (low, high) cutoff frequencies in Hz
+        order (int): Filter order
+
+    Returns:
+        np.ndarray: float32 second-order sections, shared between callers
+    """
+    nyq = 0.5 * sample_rate
+    low, high = band
+    # Keep the upper edge inside the Nyquist range for low sample rates
+    high = min(high, 0.99 * nyq)
+    sos = butter(order, [low / nyq, high / nyq], btype='band', output='sos').astype(np.float32)
+    logger.debug(f"Designed bandpass filter {low}-{high}Hz for {sample_rate}Hz audio")
+    return sos
+
+class BandpassFilter:
+    """
+    Stateful bandpass filter for interleaved PCM.
+
+    Filter state is carried across calls, so audio can be fed block by block as
+    it streams in and the output matches filtering the whole signal at once.
+    """
+
+    def __init__(self, sample_rate, channels=1, band=SPEECH_BAND, order=FILTER_ORDER):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sos = bandpass_sos(sample_rate, tuple(band), order)
+        self.reset()
+
+    def reset(self):
+        """Clear the filter state before starting an unrelated signal."""
+        self.zi = np.zeros((self.sos.shape[0], 2, self.channels), dtype=np.float32)
+
+    def process(self, block):
+        """
+        Filter a float32 block of shape (frames, channels).
+
+        Returns:
+            np.ndarray: Filtered float32 block of the same shape
+        """
+        filtered, self.zi = sosfilt(self.sos, block, axis=0, zi=self.zi)
+        return filtered.astype(np.float32, copy=False)
+
+    def process_pcm(self, samples, sample_width=2):
+        """
+        Filter interleaved integer PCM samples.
+
+        Args:
+            samples (array-like | bytes): Interleaved integer samples. With a
+                sample width of 3, packed 24-bit bytes or their int32 values
+            sample_width (int): Bytes per sample (1, 2, 3 or 4)
+
+        Returns:
+            np.ndarray: Filtered samples with the same integer dtype; for
+                3-byte samples the packed 24-bit PCM as uint8
+        """
+        if sample_width == 3:
+            if isinstance(samples, (bytes, bytearray, memoryview)):
+                samples = unpack_int24(samples)
+            return pack_int24(self._filter_int(np.asarray(samples, dtype=np.int32), *INT24_RANGE))
+        dtype = SAMPLE_DTYPES.get(sample_width)
+        if dtype is None:
+            raise ValueError(f"Unsupported sample width: {sample_width}")
+        if isinstance(samples, (bytes, bytearray, memoryview)):
+            samples = np.frombuffer(samples, dtype=dtype)
+        else:
+            samples = np.asarray(samples, dtype=dtype)
+        info = np.iinfo(dtype)
+        return self._filter_int(samples, info.min, info.max)
+
+    def _filter_int(self, samples, low, high):
+        # Filter integer samples scaled to [-1, 1) and clip back to [low, high]
+        scale = np.float32(-float(low))
+
+        frames = samples[:len(samples) - len(samples) % self.channels].reshape(-1, self.channels)
+        output = np.empty_like(frames)
+        for start in range(0, len(frames), BLOCK_FRAMES):
+            block = frames[start:start + BLOCK_FRAMES].astype(np.float32) / scale
+            filtered = self.process(block)
+            filtered *= scale
+            np.clip(filtered, low, high, out=filtered)
+            output[start:start + BLOCK_FRAMES] = filtered
+        return output.reshape(-1)
@@ -1,5 +1,10 @@
+import io
 import os
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from counters import HitCounters
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -9,6 +14,15 @@ import datetime
 
 logger = logging.getLogger(__name__)
 
+# Total size of rendered PDFs kept in memory per process before least
+# recently downloaded ones are dropped. 0 disables the cache.
+PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+_cache = OrderedDict()  # transcription id -> (content hash, pdf bytes)
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_counters = HitCounters("evictions")
+
 def create_pdf(title, transcription, summary, output_path):
     """
     Creates a PDF document containing transcription and summary information.
@@ -17,7 +31,8 @@ def create_pdf(title, transcription, summary, output_path):
         title (str): Title of the transcription
         transcription (str): Full transcription text
         summary (str): Summary text
-        output_path (str): Path where the PDF will be saved
+        output_path (str | file-like): Path where the PDF will be saved, or
+            a binary buffer to write it to
     
     Returns:
         bool: True if successful, False otherwise
@@ -90,9 +105,86 @@ def create_pdf(title, transcription, summary, output_path):
         # Build the PDF
         doc.build(elements)
         
-        logger.info(f"PDF created successfully: {output_path}")
+        logger.info(f"PDF created successfully: {output_path if isinstance(output_path, str) else 'in memory'}")
         return True
         
     except Exception as e:
         logger.error(f"Error creating PDF: {str(e)}")
         return False
+
+def render_pdf(title, transcription, summary):
+    """
+    Render the PDF of a transcription in memory.
+
+    Returns:
+        bytes | None: The PDF, or None if it could not be created
+    """
+    buffer = io.BytesIO()
+    if not create_pdf(title, transcription, summary, buffer):
+        return None
+    return buffer.getvalue()
+
+def content_hash(title, transcription, summary):
+    """Hash of everything that ends up in the PDF, including the generation date it prints."""
+    digest = hashlib.sha256()
+    for part in (title, transcription, summary, datetime.date.today().isoformat()):
+        digest.update((part or '').encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def pdf_cache_stats():
+    """Return this process's hit/miss/eviction counters, hit rate, entries and bytes."""
+    with _cache_lock:
+        entries, size = len(_cache), _cache_bytes
+    return _counters.snapshot(entries=entries, bytes=size)
+
+def forget_pdf(transcription_id):
+    """Drop the cached PDF of a transcription, e.g. after it was deleted."""
+    global _cache_bytes
+    with _cache_lock:
+        entry = _cache.pop(transcription_id, None)
+        if entry is not None:
+            _cache_bytes -= len(entry[1])
+
+def cached_pdf(transcription_id, title, transcription, summary):
+    """
+    Return the PDF of a transcription, rendering it only when its content changed.
+
+    One PDF is kept per transcription id together with the hash of its
+    content, so an edited transcription replaces its stale PDF instead of
+    adding another. Least recently used PDFs are evicted once the cache
+    holds more than PDF_CACHE_MAX_BYTES.
+
+    Args:
+        transcription_id (int): Id of the transcription
+        title (str): Title of the transcription
+        transcription (str): Full transcription text
+        summary (str): Summary text
+
+    Returns:
+        bytes | None: The PDF, or None if it could not be created
+    """
+    global _cache_bytes
+    key = content_hash(title, transcription, summary)
+    with _cache_lock:
+        entry = _cache.get(transcription_id)
+        if entry is not None and entry[0] == key:
+            _cache.move_to_end(transcription_id)
+            _counters.count("hits")
+            return entry[1]
+        _counters.count("misses")
+
+    pdf = render_pdf(title, transcription, summary)
+    if pdf is None or len(pdf) > PDF_CACHE_MAX_BYTES:
+        return pdf
+    with _cache_lock:
+        previous = _cache.pop(transcription_id, None)
+        if previous is not None:
+            _cache_bytes -= len(previous[1])
+        _cache[transcription_id] = (key, pdf)
+        _cache_bytes += len(pdf)
+        while _cache_bytes > PDF_CACHE_MAX_BYTES:
+            _, (_, evicted) = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+            _counters.count("evictions")
+    return pdf
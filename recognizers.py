@@ -0,0 +1,130 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+import speech_recognition as sr
+
+logger = logging.getLogger(__name__)
+
+# Backend used by transcribe_audio unless one is passed explicitly
+RECOGNIZER_BACKEND = os.environ.get("RECOGNIZER_BACKEND", "google")
+
+class RecognizerBackend:
+    """
+    Base class for speech recognition engines.
+
+    Implementations raise sr.UnknownValueError when a chunk has no intelligible
+    speech and sr.RequestError when the engine itself fails, mirroring
+    speech_recognition, so callers handle every backend the same way.
+    """
+    name = None
+    # Chunks handed to recognize_batch at once. 1 means the engine has no batching.
+    batch_size = 1
+
+    def recognize(self, audio_data):
+        """
+        Recognize a single chunk.
+
+        Args:
+            audio_data (sr.AudioData): The chunk to recognize
+
+        Returns:
+            str: Recognized text
+        """
+        raise NotImplementedError
+
+    def recognize_batch(self, audio_chunks):
+        """
+        Recognize several chunks in one call.
+
+        Args:
+            audio_chunks (list[sr.AudioData]): Chunks to recognize
+
+        Returns:
+            list: One entry per chunk, either the text or the exception raised
+                for that chunk
+        """
+        results = []
+        for audio_data in audio_chunks:
+            try:
+                results.append(self.recognize(audio_data))
+            except Exception as e:
+                results.append(e)
+        return results
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API through speech_recognition."""
+    name = "google"
+
+    def __init__(self, language="en-US"):
+        self.language = language
+
+    def recognize(self, audio_data):
+        # Recognizer instances carry mutable state, so each call gets its own
+        return sr.Recognizer().recognize_google(audio_data, language=self.language)
+
+class StandInBackend(RecognizerBackend):
+    """
+    Deterministic offline stand-in for benchmarking and development.
+
+    Results depend only on the audio bytes: the same chunk always yields the
+    same text or the same failure. Latency is modelled as a fixed per-call cost
+    plus a cost per second of audio, so batching amortizes the fixed part.
+    """
+    name = "standin"
+
+    def __init__(self, latency=None, latency_per_second=None, unknown_rate=None, error_rate=None, batch_size=None):
+        self.latency = float(os.environ.get("STANDIN_LATENCY", "0.3") if latency is None else latency)
+        self.latency_per_second = float(os.environ.get("STANDIN_LATENCY_PER_SECOND", "0.0") if latency_per_second is None else latency_per_second)
+        self.unknown_rate = float(os.environ.get("STANDIN_UNKNOWN_RATE", "0.0") if unknown_rate is None else unknown_rate)
+        self.error_rate = float(os.environ.get("STANDIN_ERROR_RATE", "0.0") if error_rate is None else error_rate)
+        self.batch_size = int(os.environ.get("STANDIN_BATCH_SIZE", "1") if batch_size is None else batch_size)
+
+    def _outcome(self, audio_data):
+        digest = hashlib.sha1(audio_data.frame_data).hexdigest()
+        roll = int(digest[:8], 16) / 0xFFFFFFFF
+        duration = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        if roll < self.error_rate:
+            return duration, sr.RequestError(f"stand-in backend failure for chunk {digest[:8]}")
+        if roll < self.error_rate + self.unknown_rate:
+            return duration, sr.UnknownValueError()
+        return duration, f"chunk {digest[:8]} {duration:.2f} seconds"
+
+    def recognize(self, audio_data):
+        result = self.recognize_batch([audio_data])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def recognize_batch(self, audio_chunks):
+        outcomes = [self._outcome(audio_data) for audio_data in audio_chunks]
+        time.sleep(self.latency + self.latency_per_second * sum(duration for duration, _ in outcomes))
+        return [outcome for _, outcome in outcomes]
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    StandInBackend.name: StandInBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_backend(name=None):
+    """
+    Return the shared backend instance for a name.
+
+    Args:
+        name (str): Backend name, defaults to RECOGNIZER_BACKEND
+
+    Returns:
+        RecognizerBackend: The configured backend
+    """
+    name = name or RECOGNIZER_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown recognizer backend '{name}'. Available: {', '.join(sorted(BACKENDS))}")
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+            logger.info(f"Initialized recognizer backend: {name}")
+        return _backends[name]
@@ -1,30 +1,33 @@
 
-import nltk
-nltk.download('punkt_tab')
-import os
-import tempfile
+import io
 from flask import render_template, redirect, url_for, flash, request, jsonify, send_file
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.utils import secure_filename
+from sqlalchemy.exc import IntegrityError
 from app import db
 from models import User, Transcription 
 from forms import LoginForm, SignupForm, AudioUploadForm, TranscriptionEditForm, SummaryEditForm
-from transcription import transcribe_audio
-from summarization import generate_summary
-from pdf_generator import create_pdf
+from jobs import submit_job, get_job, job_status, job_stats, parse_request_id, existing_submission
+from streaming import start_session, get_session, end_session
+from summarization import model_status, check_assets
+from summary_upgrade import summarize_within_deadline, schedule_upgrade
+from search import search_transcriptions, SEARCH_PAGE_SIZE
+from history import list_transcriptions, default_title
+from user_cache import invalidate_user, cache_stats as user_cache_stats
+from transcript_cache import cache_stats as transcript_cache_stats
+from summary_cache import cache_stats as summary_cache_stats
+from summary_batcher import batcher_stats
+from pdf_generator import cached_pdf, forget_pdf, pdf_cache_stats
 from app import app
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db, logger  # Adjust imports
 from models import Transcription  # Adjust model import
 import traceback
 import logging
-from pydub import AudioSegment
 
 import logging
 from uuid import uuid4
 import traceback
 import time
-import io
 import subprocess
 
 
@@ -33,11 +36,50 @@ import subprocess
 
 logger = logging.getLogger(__name__)
 
+def _job_response(job):
+    """
+    JSON state of a transcription job: 200 once done, 202 while queued or running,
+    400 if it failed and 410 if its transcription was deleted since.
+    """
+    status = job_status(job)
+    if job.status == 'done' and job.transcription_id is None:
+        return jsonify({'success': False, **status, 'error': 'The transcription of this job was deleted.'}), 410
+    if job.status == 'done':
+        url = url_for('view_transcription', id=job.transcription_id)
+        return jsonify({'success': True, **status, 'url': url})
+    if job.status == 'failed':
+        return jsonify({'success': False, **status}), 400
+    return jsonify({'success': True, **status, 'status_url': url_for('job_status_view', job_id=job.request_id)}), 202
+
 def register_routes(app):
     
     @app.route('/')
     def index():
         return render_template('index.html')
+
+    @app.route('/healthz/ready')
+    def healthz_ready():
+        status = model_status()
+        status['assets'] = check_assets()
+        return jsonify(status), 200 if status['ready'] else 503
+    
+    @app.route('/healthz/stats')
+    @login_required
+    def healthz_stats():
+        # Counters of this worker process, plus the job counts of the whole queue
+        stats = {
+            'transcript_cache': transcript_cache_stats(),
+            'summary_cache': summary_cache_stats(),
+            'user_cache': user_cache_stats(),
+            'pdf_cache': pdf_cache_stats(),
+            'summary_batchers': batcher_stats(),
+        }
+        try:
+            stats['jobs'] = job_stats()
+        except Exception as e:
+            db.session.rollback()
+            stats['jobs'] = {'error': str(e)}
+        return jsonify(stats)
     
     @app.route('/login', methods=['GET', 'POST'])
     def login():
@@ -91,6 +133,7 @@ def register_routes(app):
         if user:
             db.session.delete(user)
             db.session.commit()
+            invalidate_user(user_id)
         return redirect(url_for('admin_dashboard'))
 
     @app.route('/edit_user/<int:user_id>', methods=['GET', 'POST'])
@@ -101,6 +144,7 @@ def register_routes(app):
             user.username = request.form['username']
             user.email = request.form['email']
             db.session.commit()
+            invalidate_user(user_id)
             return redirect(url_for('admin_dashboard'))
         return render_template('edit_user.html', user=user)
         
@@ -113,8 +157,8 @@ def register_routes(app):
     @login_required
     def home():
         form = AudioUploadForm()
-        transcriptions = Transcription.query.filter_by(user_id=current_user.id).order_by(Transcription.created_at.desc()).all()
-        return render_template('home.html', form=form, transcriptions=transcriptions)
+        transcriptions, next_cursor = list_transcriptions(current_user.id, before=request.args.get('before'))
+        return render_template('home.html', form=form, transcriptions=transcriptions, next_cursor=next_cursor)
     
     @app.route('/upload_audio', methods=['POST'])
     @login_required
@@ -127,35 +171,17 @@ def register_routes(app):
                     flash('No audio file provided.')
                     return redirect(url_for('home'))
                 
-                filename = secure_filename(audio_file.filename)
-                temp_dir = tempfile.mkdtemp()
-                file_path = os.path.join(temp_dir, filename)
-                audio_file.save(file_path)
-                
-                title = form.title.data if form.title.data else f"Transcription {len(current_user.transcriptions.all()) + 1}"
-                transcription_text = transcribe_audio(file_path)
-                if not transcription_text:
-                    flash('Failed to transcribe the audio file.')
+                title = form.title.data if form.title.data else default_title(current_user.id)
+                # Transcription and summarization run in a job worker, not in this request
+                job = submit_job(current_user.id, title, audio_file.read(), filename=audio_file.filename)
+                if job.status == 'done':
+                    flash('Audio successfully transcribed!')
+                    return redirect(url_for('view_transcription', id=job.transcription_id))
+                if job.status == 'failed':
+                    flash(job.error)
                     return redirect(url_for('home'))
-                
-                logger.debug(f"Transcription text for summary: {transcription_text}")
-                summary = generate_summary(transcription_text)
-                logger.debug(f"Generated summary: {summary}")
-                
-                transcription = Transcription(
-                    title=title,
-                    transcription_text=transcription_text,
-                    summary_text=summary,
-                    user_id=current_user.id
-                )
-                db.session.add(transcription)
-                db.session.commit()
-                
-                os.unlink(file_path)
-                os.rmdir(temp_dir)
-                
-                flash('Audio successfully transcribed!')
-                return redirect(url_for('view_transcription', id=transcription.id))
+                flash('Audio uploaded. It is being transcribed and will appear in your history when done.')
+                return redirect(url_for('home'))
             except Exception as e:
                 logger.error(f"Error in upload_audio: {str(e)}")
                 flash(f'Error processing audio: {str(e)}')
@@ -176,73 +202,134 @@ def register_routes(app):
             audio_file = request.files['audio']
             logger.debug(f"Received audio file: {audio_file.filename}, content length: {request.content_length}, mimetype: {audio_file.mimetype}")
             
-            title = request.form.get('title', f"Recording {len(Transcription.query.filter_by(user_id=current_user.id).all()) + 1}")
-            request_id = request.form.get('request_id', str(uuid4()))
+            # Retries and double submits of a recording carry the same request_id
+            # and get the earlier result instead of transcribing it again
+            request_id = parse_request_id(request.form.get('request_id'))
+            existing = existing_submission(current_user.id, request_id) if request_id else None
+            if isinstance(existing, Transcription):
+                logger.info(f"Recording {request_id} was already transcribed as {existing.id}")
+                return jsonify({'success': True, 'id': existing.id})
+            if existing is not None:
+                logger.info(f"Recording {request_id} was already submitted, job is {existing.status}")
+                return _job_response(existing)
 
-            temp_dir = tempfile.mkdtemp()
-            original_filename = secure_filename(audio_file.filename or 'recording.webm')
-            original_file_path = os.path.join(temp_dir, original_filename)
-            
-            audio_file.save(original_file_path)
-            if not os.path.exists(original_file_path):
-                error_msg = f"Failed to save audio file to {original_file_path}"
-                logger.error(error_msg)
-                for file in [original_file_path]:
-                    if os.path.exists(file):
-                        os.unlink(file)
-                os.rmdir(temp_dir)
-                return jsonify({'success': False, 'error': error_msg}), 400
-            logger.info(f"Saved original file as: {original_file_path}, size: {os.path.getsize(original_file_path)} bytes")
+            title = request.form.get('title')
+            if title is None:
+                title = default_title(current_user.id, "Recording")
+            # Returns as soon as the job is queued; the client polls job_status_view
+            job = submit_job(current_user.id, title, audio_file.read(), filename=audio_file.filename or 'recording.webm',
+                             noise_reduction=True, request_id=request_id)
+            return _job_response(job)
+        except Exception as e:
+            logger.error(f"Error in transcribe_recording: {str(e)} with traceback: {traceback.format_exc()}")
+            return jsonify({'success': False, 'error': f'Error processing audio: {str(e)}'}), 500
 
-            wav_file_path = os.path.join(temp_dir, 'recording.wav')
-            try:
-                audio = AudioSegment.from_file(original_file_path)
-                logger.debug(f"Original audio duration: {len(audio) / 1000} seconds")
-                audio = audio.set_frame_rate(16000).set_channels(1).set_sample_width(2)
-                audio.export(wav_file_path, format='wav', parameters=["-acodec", "pcm_s16le"])
-                logger.info(f"Converted to WAV: {wav_file_path}, size: {os.path.getsize(wav_file_path)} bytes")
-            except Exception as e:
-                error_msg = f"Error converting audio to WAV: {str(e)} with traceback: {traceback.format_exc()}"
-                logger.error(error_msg)
-                with open(original_file_path, 'rb') as f:
-                    logger.debug(f"File header: {f.read(44).hex() if f.read(44) else 'Empty'}")
-                for file in [original_file_path, wav_file_path]:
-                    if os.path.exists(file):
-                        os.unlink(file)
-                os.rmdir(temp_dir)
-                return jsonify({'success': False, 'error': error_msg}), 400
+    @app.route('/jobs/<job_id>', methods=['GET'])
+    @login_required
+    def job_status_view(job_id):
+        job = get_job(job_id, current_user.id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Unknown job.'}), 404
+        return _job_response(job)
+
+    @app.route('/stream/start', methods=['POST'])
+    @login_required
+    def stream_start():
+        try:
+            session = start_session(current_user.id)
+            return jsonify({'success': True, 'session_id': session.id})
+        except Exception as e:
+            logger.error(f"Error in stream_start: {str(e)} with traceback: {traceback.format_exc()}")
+            return jsonify({'success': False, 'error': f'Could not start live transcription: {str(e)}'}), 500
+
+    @app.route('/stream/<session_id>/chunk', methods=['POST'])
+    @login_required
+    def stream_chunk(session_id):
+        session = get_session(session_id, current_user.id)
+        if session is None:
+            return jsonify({'success': False, 'error': 'Unknown stream.'}), 404
+        try:
+            session.write(request.get_data(), seq=request.args.get('seq', type=int))
+        except (BrokenPipeError, OSError) as e:
+            logger.error(f"Decoder for stream {session_id} failed: {str(e)}")
+            return jsonify({'success': False, 'error': 'Live decoding failed.'}), 500
+        return jsonify({'success': True, 'partial': session.partial_text(), 'segments': session.segment_count})
+
+    @app.route('/stream/<session_id>', methods=['GET'])
+    @login_required
+    def stream_status(session_id):
+        session = get_session(session_id, current_user.id)
+        if session is None:
+            return jsonify({'success': False, 'error': 'Unknown stream.'}), 404
+        return jsonify({'success': True, 'partial': session.partial_text(), 'segments': session.segment_count})
+
+    @app.route('/stream/<session_id>/stop', methods=['POST'])
+    @login_required
+    def stream_stop(session_id):
+        session = end_session(session_id, current_user.id)
+        if session is None:
+            return jsonify({'success': False, 'error': 'Unknown stream.'}), 404
+        try:
+            request_id = parse_request_id(request.form.get('request_id'))
+            existing = existing_submission(current_user.id, request_id) if request_id else None
+            if existing is not None:
+                session.abort()
+                if isinstance(existing, Transcription):
+                    return jsonify({'success': True, 'id': existing.id})
+                return _job_response(existing)
+            request_id = request_id or str(uuid4())
+            title = request.form.get('title')
+            if title is None:
+                title = default_title(current_user.id, "Recording")
             
-            transcription_text = transcribe_audio(wav_file_path, noise_reduction=True)
+            # Everything but the last segment was recognized while recording
+            transcription_text = session.finish()
+            if not transcription_text and session.segment_count == 0:
+                # Nothing reached the speech threshold. The upload path recognizes the
+                # whole recording in that case, which the live decoder no longer holds.
+                return jsonify({'success': False, 'error': 'No speech detected in the live stream.', 'upload': True}), 409
             if not transcription_text:
                 error_msg = 'Failed to transcribe the audio file. Check audio format or transcription service.'
                 logger.warning(error_msg)
-                logger.debug(f"WAV file details: size={os.path.getsize(wav_file_path)} bytes, path={wav_file_path}")
-                with open(wav_file_path, 'rb') as f:
-                    logger.debug(f"WAV file header: {f.read(44).hex()}")
-                for file in [wav_file_path, original_file_path]:
-                    if os.path.exists(file):
-                        os.unlink(file)
-                os.rmdir(temp_dir)
                 return jsonify({'success': False, 'error': error_msg}), 400
             
-            logger.debug(f"Transcription text for summary: {transcription_text}")
-            summary = generate_summary(transcription_text)
-            logger.debug(f"Generated summary: {summary}")
-            
+            summary, degraded = summarize_within_deadline(transcription_text)
             transcription = Transcription(title=title, transcription_text=transcription_text, summary_text=summary, user_id=current_user.id, request_id=request_id)
             db.session.add(transcription)
-            db.session.commit()
-            transcription_id = transcription.id
-            
-            for file in [wav_file_path, original_file_path]:
-                if os.path.exists(file):
-                    os.unlink(file)
-            os.rmdir(temp_dir)
-            
-            return jsonify({'success': True, 'id': transcription_id})
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # A concurrent submission of the same recording was saved first
+                db.session.rollback()
+                existing = Transcription.query.filter_by(user_id=current_user.id, request_id=request_id).first()
+                if existing is None:
+                    raise
+                return jsonify({'success': True, 'id': existing.id})
+            if degraded:
+                schedule_upgrade(transcription.id, transcription_text, summary)
+            return jsonify({'success': True, 'id': transcription.id})
         except Exception as e:
-            logger.error(f"Error in transcribe_recording: {str(e)} with traceback: {traceback.format_exc()}")
+            logger.error(f"Error in stream_stop: {str(e)} with traceback: {traceback.format_exc()}")
             return jsonify({'success': False, 'error': f'Error processing audio: {str(e)}'}), 500
+
+    @app.route('/search')
+    @login_required
+    def search():
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'success': False, 'error': 'Missing search query.'}), 400
+        try:
+            results = search_transcriptions(current_user.id, query,
+                                            page=request.args.get('page', 1, type=int),
+                                            per_page=request.args.get('per_page', SEARCH_PAGE_SIZE, type=int))
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error in search: {str(e)} with traceback: {traceback.format_exc()}")
+            return jsonify({'success': False, 'error': 'Search failed.'}), 500
+        for result in results['results']:
+            result['url'] = url_for('view_transcription', id=result['id'])
+        return jsonify({'success': True, 'query': query, **results})
+
     @app.route('/view_transcription/<int:id>')
     @login_required
     def view_transcription(id):
@@ -260,9 +347,12 @@ def register_routes(app):
             form.transcription.data = transcription.transcription_text
             
         if form.validate_on_submit():
+            summary, degraded = summarize_within_deadline(form.transcription.data)
             transcription.transcription_text = form.transcription.data
-            transcription.summary_text = generate_summary(form.transcription.data)
+            transcription.summary_text = summary
             db.session.commit()
+            if degraded:
+                schedule_upgrade(transcription.id, form.transcription.data, summary)
             flash('Transcription updated successfully!')
             return redirect(url_for('view_transcription', id=id))
             
@@ -290,18 +380,16 @@ def register_routes(app):
     def download_pdf(id):
         transcription = Transcription.query.filter_by(id=id, user_id=current_user.id).first_or_404()
         
-        # Create a temporary file to store the PDF
-        temp_file = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
-        pdf_path = temp_file.name
-        temp_file.close()
-        
-        # Generate the PDF
-        create_pdf(transcription.title, transcription.transcription_text, 
-                   transcription.summary_text, pdf_path)
+        # Rendered in memory and reused until the transcription changes
+        pdf = cached_pdf(transcription.id, transcription.title, transcription.transcription_text,
+                         transcription.summary_text)
+        if pdf is None:
+            flash('Could not create the PDF.')
+            return redirect(url_for('view_transcription', id=id))
         
         # Serve the file
         return send_file(
-            pdf_path,
+            io.BytesIO(pdf),
             as_attachment=True,
             download_name=f"{transcription.title.replace(' ', '_')}.pdf",
             mimetype='application/pdf'
@@ -313,6 +401,7 @@ def register_routes(app):
         transcription = Transcription.query.filter_by(id=id, user_id=current_user.id).first_or_404()
         db.session.delete(transcription)
         db.session.commit()
+        forget_pdf(id)
         flash('Transcription deleted successfully!')
         return redirect(url_for('home'))
 
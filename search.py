@@ -0,0 +1,73 @@
+import os
+import logging
+from markupsafe import escape
+from sqlalchemy import func
+from app import db
+from models import Transcription
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = 'english'
+SEARCH_PAGE_SIZE = int(os.environ.get("SEARCH_PAGE_SIZE", "20"))
+SEARCH_MAX_PAGE_SIZE = 100
+# Control characters mark the matches in ts_headline output, so the snippet can
+# be HTML-escaped before the markers are turned into <mark> tags
+_START, _STOP = '\x02', '\x03'
+HEADLINE_OPTIONS = f"StartSel={_START}, StopSel={_STOP}, MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=\" … \""
+
+def highlight(snippet):
+    """Escape a ts_headline snippet and wrap the matched terms in <mark>."""
+    return str(escape(snippet or '')).replace(_START, '<mark>').replace(_STOP, '</mark>')
+
+def search_transcriptions(user_id, query, page=1, per_page=SEARCH_PAGE_SIZE):
+    """
+    Full-text search over one user's transcriptions.
+
+    Matches use the GIN-indexed search_vector column (title, summary and
+    transcript, weighted in that order) and are ranked with ts_rank_cd.
+    Snippets are only generated for the rows of the requested page.
+
+    Args:
+        user_id (int): Owner of the transcriptions
+        query (str): Web-search style query (quoted phrases, OR, -term)
+        page (int): 1-based page number
+        per_page (int): Results per page, capped at SEARCH_MAX_PAGE_SIZE
+
+    Returns:
+        dict: total match count, page, per_page and results, each with id,
+            title, created_at, rank and an HTML-safe highlighted snippet
+    """
+    page = max(1, page)
+    per_page = max(1, min(per_page, SEARCH_MAX_PAGE_SIZE))
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    matches = Transcription.query.filter(Transcription.user_id == user_id,
+                                         Transcription.search_vector.op('@@')(tsquery))
+    total = matches.count()
+
+    rank = func.ts_rank_cd(Transcription.search_vector, tsquery).label('rank')
+    page_rows = (db.session.query(Transcription.id, rank)
+                 .filter(Transcription.user_id == user_id, Transcription.search_vector.op('@@')(tsquery))
+                 .order_by(rank.desc(), Transcription.id.desc())
+                 .limit(per_page).offset((page - 1) * per_page)
+                 .subquery())
+    snippet = func.ts_headline(SEARCH_CONFIG, Transcription.transcription_text, tsquery, HEADLINE_OPTIONS).label('snippet')
+    rows = (db.session.query(Transcription.id, Transcription.title, Transcription.created_at, page_rows.c.rank, snippet)
+            .join(page_rows, page_rows.c.id == Transcription.id)
+            .order_by(page_rows.c.rank.desc(), Transcription.id.desc())
+            .all())
+    logger.debug(f"Search for user {user_id} matched {total} transcriptions, returning page {page}")
+    return {
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'results': [
+            {
+                'id': row.id,
+                'title': row.title,
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'rank': float(row.rank),
+                'snippet': highlight(row.snippet),
+            }
+            for row in rows
+        ],
+    }
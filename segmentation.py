@@ -0,0 +1,304 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FRAME_MS = 10
+FULL_SCALE = {1: 128.0, 2: 32768.0, 4: 2147483648.0}
+
+def frame_energy_dbfs(samples, sample_rate=16000, frame_ms=FRAME_MS):
+    """
+    Compute per-frame RMS energy in dBFS over non-overlapping frames.
+
+    Frames are a strided view over the sample buffer, so no per-frame copies
+    are made. A trailing partial frame is included.
+
+    Args:
+        samples (np.ndarray): Mono integer PCM samples
+        sample_rate (int): Sample rate of the samples
+        frame_ms (int): Frame length in milliseconds
+
+    Returns:
+        np.ndarray: float64 dBFS per frame (-inf for digital silence)
+    """
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    full_scale = FULL_SCALE.get(samples.dtype.itemsize, 32768.0)
+    n_full = len(samples) // frame_len
+
+    frames = samples[:n_full * frame_len].reshape(n_full, frame_len)
+    energy = np.einsum('ij,ij->i', frames, frames, dtype=np.float64, casting='unsafe') / frame_len
+    tail = samples[n_full * frame_len:]
+    if len(tail):
+        tail = tail.astype(np.float64)
+        energy = np.append(energy, np.dot(tail, tail) / len(tail))
+
+    with np.errstate(divide='ignore'):
+        return 10 * np.log10(energy / (full_scale * full_scale))
+
+def detect_speech_segments(samples, sample_rate=16000, min_silence_len=500, silence_thresh=-40,
+                           keep_silence=300, hysteresis_db=3.0, frame_ms=FRAME_MS):
+    """
+    Find speech regions and return their sample-index boundaries.
+
+    Vectorized replacement for pydub's split_on_silence. A frame switches to
+    speech when its level reaches silence_thresh and only switches back once it
+    drops below silence_thresh - hysteresis_db. Silences shorter than
+    min_silence_len do not split a segment. Each segment is padded by
+    keep_silence on both sides, with overlapping padding split at the midpoint.
+
+    Args:
+        samples (np.ndarray): Mono integer PCM samples
+        sample_rate (int): Sample rate of the samples
+        min_silence_len (int): Minimum silence in ms that splits two segments
+        silence_thresh (float): Level in dBFS below which audio is silence
+        keep_silence (int): Padding in ms kept around each segment
+        hysteresis_db (float): Extra drop below silence_thresh needed to leave speech
+        frame_ms (int): Analysis frame length in milliseconds
+
+    Returns:
+        np.ndarray: int64 array of shape (n, 2) with [start, end) sample indices
+    """
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    dbfs = frame_energy_dbfs(samples, sample_rate, frame_ms)
+    n_frames = len(dbfs)
+    if n_frames == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Dual-threshold state: 1 above the onset level, 0 below the release level,
+    # frames in between inherit the previous decision (forward fill).
+    state = np.full(n_frames, -1, dtype=np.int8)
+    state[dbfs >= silence_thresh] = 1
+    state[dbfs < silence_thresh - hysteresis_db] = 0
+    decided = np.where(state >= 0, np.arange(n_frames), 0)
+    np.maximum.accumulate(decided, out=decided)
+    speech = state[decided] == 1
+
+    edges = np.diff(np.concatenate(([0], speech.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Bridge silences shorter than min_silence_len, including at the edges
+    min_silence_frames = max(1, int(np.ceil(min_silence_len / frame_ms)))
+    long_gap = (starts[1:] - ends[:-1]) >= min_silence_frames
+    starts = starts[np.concatenate(([True], long_gap))]
+    ends = ends[np.concatenate((long_gap, [True]))]
+    if starts[0] < min_silence_frames:
+        starts[0] = 0
+    if n_frames - ends[-1] < min_silence_frames:
+        ends[-1] = n_frames
+
+    n_samples = len(samples)
+    bounds = pad_segments(starts * frame_len, np.minimum(ends * frame_len, n_samples),
+                          int(sample_rate * keep_silence / 1000), n_samples)
+    logger.debug(f"Detected {len(bounds)} speech segments in {n_samples / sample_rate:.1f}s of audio")
+    return bounds
+
+def pad_segments(starts, ends, pad, n_samples):
+    """
+    Pad segments on both sides, splitting overlapping padding at the midpoint.
+
+    Args:
+        starts (array-like): Segment start sample indices
+        ends (array-like): Segment end sample indices (exclusive)
+        pad (int): Samples of padding per side
+        n_samples (int): Length of the signal, used for clamping
+
+    Returns:
+        np.ndarray: int64 array of shape (n, 2) with [start, end) sample indices
+    """
+    bounds = np.stack((np.asarray(starts, dtype=np.int64) - pad, np.asarray(ends, dtype=np.int64) + pad), axis=1)
+    overlap = bounds[1:, 0] < bounds[:-1, 1]
+    midpoints = (bounds[1:, 0] + bounds[:-1, 1]) // 2
+    bounds[:-1, 1] = np.where(overlap, midpoints, bounds[:-1, 1])
+    bounds[1:, 0] = np.where(overlap, midpoints, bounds[1:, 0])
+    np.clip(bounds, 0, n_samples, out=bounds)
+    return bounds
+
+def split_long_segments(bounds, samples, sample_rate=16000, max_seconds=30.0, frame_ms=FRAME_MS):
+    """
+    Split segments longer than max_seconds at their quietest frame.
+
+    The cut point is searched in the second half of the allowed length, so
+    no piece is shorter than half of max_seconds unless the segment itself
+    ends sooner.
+
+    Args:
+        bounds (np.ndarray): (n, 2) [start, end) sample indices
+        samples (np.ndarray): Mono integer PCM samples the bounds refer to
+        sample_rate (int): Sample rate of the samples
+        max_seconds (float): Longest allowed segment
+        frame_ms (int): Analysis frame length in milliseconds
+
+    Returns:
+        np.ndarray: int64 array of shape (m, 2) with m >= n
+    """
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    max_samples = max(2 * frame_len, int(max_seconds * sample_rate))
+    out = []
+    for start, end in np.asarray(bounds, dtype=np.int64):
+        while end - start > max_samples:
+            lo = start + max_samples // 2
+            dbfs = frame_energy_dbfs(samples[lo:start + max_samples], sample_rate, frame_ms)
+            # Cut at the start of the quietest whole frame, latest one on ties
+            quietest = len(dbfs) - 1 - int(np.argmin(dbfs[::-1]))
+            cut = min(lo + quietest * frame_len, start + max_samples)
+            out.append((start, cut))
+            start = cut
+        out.append((start, end))
+    return np.array(out, dtype=np.int64).reshape(-1, 2)
+
+def merge_short_segments(bounds, target_seconds=15.0, sample_rate=16000):
+    """
+    Merge runs of adjacent segments while the merged span stays within target_seconds.
+
+    A merged segment spans from the first start to the last end, including
+    the pauses in between.
+
+    Returns:
+        np.ndarray: int64 array of shape (m, 2) with m <= n
+    """
+    bounds = np.asarray(bounds, dtype=np.int64).reshape(-1, 2)
+    if len(bounds) < 2 or target_seconds <= 0:
+        return bounds
+    target_samples = int(target_seconds * sample_rate)
+    out = [list(bounds[0])]
+    for start, end in bounds[1:]:
+        if end - out[-1][0] <= target_samples:
+            out[-1][1] = end
+        else:
+            out.append([start, end])
+    return np.array(out, dtype=np.int64)
+
+def coalesce_segments(bounds, samples, sample_rate=16000, target_seconds=15.0, max_seconds=30.0, frame_ms=FRAME_MS):
+    """
+    Even out segment lengths before recognition.
+
+    Overlong segments are split at their quietest point, then short
+    neighbours are merged up to target_seconds. Fewer, evenly sized chunks
+    mean fewer recognizer round trips without sending anything over the
+    recognizer's practical limit.
+
+    Returns:
+        np.ndarray: int64 array of shape (m, 2) with [start, end) sample indices
+    """
+    bounds = split_long_segments(bounds, samples, sample_rate, max_seconds, frame_ms)
+    return merge_short_segments(bounds, min(target_seconds, max_seconds), sample_rate)
+
+class IncrementalSegmenter:
+    """
+    Close speech segments while audio is still arriving.
+
+    Only the currently open chunk (plus a little silence) is buffered.
+    Segments are coalesced as in coalesce_segments: neighbours are merged up
+    to target_seconds, and a chunk is emitted once it reaches that length and
+    is followed by a full min_silence_len pause. An open segment longer than
+    max_segment_seconds is cut at its quietest point.
+    """
+
+    def __init__(self, sample_rate=16000, max_segment_seconds=30.0, min_silence_len=500, silence_thresh=-40,
+                 keep_silence=300, hysteresis_db=3.0, target_seconds=0.0):
+        self.sample_rate = sample_rate
+        self.max_seconds = max_segment_seconds
+        self.target_seconds = min(target_seconds, max_segment_seconds)
+        self.max_segment_samples = int(max_segment_seconds * sample_rate)
+        self.target_samples = int(self.target_seconds * sample_rate)
+        self.params = dict(min_silence_len=min_silence_len, silence_thresh=silence_thresh,
+                           keep_silence=keep_silence, hysteresis_db=hysteresis_db)
+        self.keep_samples = sample_rate * keep_silence // 1000
+        # Silence after a padded segment end that proves the segment is over
+        self.close_gap_samples = sample_rate * max(min_silence_len - keep_silence, 0) // 1000
+        self.frame_samples = sample_rate * FRAME_MS // 1000
+        self.pending = np.empty(0, dtype=np.int16)
+        self.offset = 0  # absolute sample index of pending[0]
+        self.floor = 0  # absolute end of the last emitted segment
+        self.emitted_samples = 0
+        self.received_samples = 0
+        self.emitted_count = 0
+        # Speech segments as detected, before coalescing into the emitted chunks
+        self.raw_count = 0
+        self.raw_samples = 0
+
+    def feed(self, samples):
+        """
+        Add samples and return the segments they closed.
+
+        Returns:
+            list[tuple[int, int, np.ndarray]]: (start, end, samples) per closed
+                segment, with absolute sample indices
+        """
+        self.pending = np.concatenate((self.pending, samples))
+        self.received_samples += len(samples)
+        return self._close(final=False)
+
+    def finish(self):
+        """Close and return whatever is still open at the end of the stream."""
+        return self._close(final=True)
+
+    def stats(self):
+        """
+        Return how coalescing changed the segments emitted so far.
+
+        Returns:
+            tuple[int, float, int, float]: Detected segments and their mean
+                seconds, emitted chunks and their mean seconds
+        """
+        def mean(samples, count):
+            return samples / count / self.sample_rate if count else 0.0
+        return (self.raw_count, mean(self.raw_samples, self.raw_count),
+                self.emitted_count, mean(self.emitted_samples, self.emitted_count))
+
+    def _drop(self, position):
+        # Drop pending audio before an absolute position, staying on the frame
+        # grid of the whole stream so energies match a whole-buffer pass
+        position -= position % self.frame_samples
+        dropped = max(position - self.offset, 0)
+        self.pending = self.pending[dropped:]
+        self.offset += dropped
+
+    def _close(self, final):
+        if len(self.pending) == 0:
+            return []
+        bounds = detect_speech_segments(self.pending, self.sample_rate, **self.params)
+        if len(bounds) == 0:
+            if not final:
+                # Only silence so far, keep just enough to pad the next segment
+                self._drop(self.offset + len(self.pending) - self.keep_samples)
+            return []
+
+        raw_end = bounds[-1][1]
+        raw_bounds = bounds
+        bounds = coalesce_segments(bounds, self.pending, self.sample_rate, self.target_seconds, self.max_seconds)
+        closed = len(bounds)
+        if not final:
+            # Earlier chunks are complete: the next segment did not fit into them.
+            # The last one waits for a pause, and for more speech to merge with
+            # until it reaches the target or the silence after it grows too long.
+            start, end = bounds[-1]
+            trailing = len(self.pending) - raw_end
+            paused = trailing >= self.close_gap_samples
+            long_enough = end - start >= self.target_samples or len(self.pending) - start > self.max_segment_samples
+            if not (paused and long_enough):
+                closed -= 1
+        if closed == 0:
+            return []
+
+        segments = []
+        for start, end in bounds[:closed]:
+            # Leading padding may reach into audio that was already emitted
+            start = max(self.offset + int(start), self.floor)
+            end = self.offset + int(end)
+            segments.append((start, end, self.pending[start - self.offset:end - self.offset].copy()))
+        # Detected segments covered by the closed chunks; the rest of one cut
+        # at the last chunk's end is detected again with the next chunk
+        raw = np.clip(raw_bounds, segments[0][0] - self.offset, segments[-1][1] - self.offset)
+        raw_lengths = raw[:, 1] - raw[:, 0]
+        self.raw_count += int(np.count_nonzero(raw_lengths))
+        self.raw_samples += int(raw_lengths.sum())
+        self.floor = segments[-1][1]
+        self.emitted_count += len(segments)
+        self.emitted_samples += sum(end - start for start, end, _ in segments)
+        # Keep the silence after the last segment so the next one can be padded
+        self._drop(self.floor - self.keep_samples)
+        return segments
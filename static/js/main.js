@@ -99,6 +99,7 @@ function initializeRecording() {
     const titleInput = document.getElementById('recordingTitle');
     const submitButton = document.getElementById('submit');
     const recordForm = document.getElementById('recordForm');
+    const liveTranscript = document.getElementById('liveTranscript');
 
     let recorder;
     let audioChunks = [];
@@ -108,6 +109,12 @@ function initializeRecording() {
     let canvas;
     let canvasCtx;
     let recordedBlob = null;
+    // One id per recording, so retries and double submits of it are recognized by the server
+    let requestId = null;
+    let streamSessionId = null;
+    let streamFailed = false;
+    let streamSeq = 0;
+    let streamQueue = Promise.resolve();
 
     function getMp3MediaRecorderOptions() {
         const options = {};
@@ -121,6 +128,42 @@ function initializeRecording() {
         return options;
     }
 
+    // Live transcription: fragments are streamed while recording so the server can
+    // recognize finished segments before stop is pressed. Any failure falls back
+    // to uploading the whole blob on submit.
+    function startStream() {
+        streamSessionId = null;
+        streamFailed = false;
+        streamSeq = 0;
+        if (liveTranscript) liveTranscript.textContent = '';
+        streamQueue = fetch('/stream/start', { method: 'POST' })
+            .then(response => response.ok ? response.json() : Promise.reject(new Error(`Server error: ${response.status}`)))
+            .then(data => {
+                if (!data.success) throw new Error(data.error || 'Unknown server error');
+                streamSessionId = data.session_id;
+            })
+            .catch(error => {
+                console.warn('Live transcription unavailable:', error);
+                streamFailed = true;
+            });
+    }
+
+    function sendFragment(blob) {
+        const seq = streamSeq++;
+        streamQueue = streamQueue.then(() => {
+            if (streamFailed || !streamSessionId) return;
+            return fetch(`/stream/${streamSessionId}/chunk?seq=${seq}`, { method: 'POST', body: blob })
+                .then(response => response.ok ? response.json() : Promise.reject(new Error(`Server error: ${response.status}`)))
+                .then(data => {
+                    if (data.partial && liveTranscript) liveTranscript.textContent = data.partial;
+                })
+                .catch(error => {
+                    console.warn('Live transcription interrupted:', error);
+                    streamFailed = true;
+                });
+        });
+    }
+
     function startRecording() {
         const constraints = {
             audio: { echoCancellation: true, noiseSuppression: true, autoGainControl: true }
@@ -144,11 +187,15 @@ function initializeRecording() {
                 setupVisualization(stream, recordingVisualizerContainer, isRecordingRef);
                 
                 recorder.ondataavailable = e => {
-                    if (e.data.size > 0) audioChunks.push(e.data); // Only push non-empty chunks
+                    if (e.data.size > 0) { // Only push non-empty chunks
+                        audioChunks.push(e.data);
+                        sendFragment(e.data);
+                    }
                 };
                 recorder.onstop = () => {
                     isRecordingRef.value = false;
                     recordedBlob = new Blob(audioChunks, { type: recorder.mimeType || 'audio/wav' });
+                    requestId = newRequestId();
                     console.log("Recording stopped, blob created with type:", recordedBlob.type, "size:", recordedBlob.size, "duration (approx):", recordedBlob.size / 128000 * 8, "seconds");
                     stopRecordButton.classList.add('d-none');
                     submitButton.disabled = false;
@@ -160,6 +207,7 @@ function initializeRecording() {
                 };
                 
                 audioChunks = [];
+                startStream();
                 recorder.start(250); // Reduced to 250ms chunks for better boundary detection
                 isRecording = true;
                 
@@ -189,7 +237,6 @@ function initializeRecording() {
     }
 
     let isSubmitting = false;
-    let requestId = 0;
 
     // Remove existing listener before adding new one
     const existingSubmitListener = recordForm._submitListener;
@@ -219,7 +266,8 @@ function initializeRecording() {
         isSubmitting = true;
         submitButton.disabled = true;
         recordForm.querySelectorAll('button').forEach(btn => btn.disabled = true);
-        const currentRequestId = ++requestId;
+        if (!requestId) requestId = newRequestId();
+        const currentRequestId = requestId;
         const title = titleInput ? titleInput.value.trim() || 'Voice Recording' : 'Voice Recording';
         formData.append('audio', recordedBlob, `recording.${recordedBlob.type.split('/')[1] || 'wav'}`);
         formData.append('title', title);
@@ -237,13 +285,36 @@ function initializeRecording() {
         recordStatus.classList.remove('text-success');
         recordStatus.classList.add('text-warning');
 
+        // Finish the live stream if it survived the whole recording, otherwise upload the blob.
+        // A stream that heard no speech (409) is uploaded too, so the job can recognize it whole.
+        function submitRecording() {
+            const uploadRecording = () => fetch('/transcribe_recording', { method: 'POST', body: formData });
+            return streamQueue.then(() => {
+                if (!streamSessionId || streamFailed) return uploadRecording();
+                const stopData = new FormData();
+                stopData.append('title', title);
+                stopData.append('request_id', currentRequestId);
+                const sessionId = streamSessionId;
+                streamSessionId = null;
+                return fetch(`/stream/${sessionId}/stop`, { method: 'POST', body: stopData })
+                    .then(response => response.status === 404 || response.status === 409 ? uploadRecording() : response);
+            });
+        }
+
+        // Uploaded recordings are transcribed by a background job; poll it until it has a transcription
+        function waitForJob(data) {
+            if (!data.success || data.id || !data.status_url) return data;
+            recordStatus.textContent = `Processing (${data.stage})...`;
+            return new Promise(resolve => setTimeout(resolve, 2000))
+                .then(() => fetch(data.status_url))
+                .then(response => response.json())
+                .then(waitForJob);
+        }
+
         let attempt = 0;
         const maxAttempts = 1;
         function makeRequest() {
-            fetch('/transcribe_recording', {
-                method: 'POST',
-                body: formData
-            })
+            submitRecording()
             .then(response => {
                 if (!response.ok) {
                     return response.text().then(text => {
@@ -252,6 +323,7 @@ function initializeRecording() {
                 }
                 return response.json();
             })
+            .then(waitForJob)
             .then(data => {
                 console.log('Server response:', data);
                 if (data.success) {
@@ -272,6 +344,7 @@ function initializeRecording() {
                     setTimeout(() => {
                         window.location.href = `/view_transcription/${data.id}`;
                         recordedBlob = null;
+                        requestId = null;
                         recordForm.reset();
                         const resultCards = document.getElementById('resultCards');
                         if (resultCards) resultCards.classList.add('d-none');
@@ -348,6 +421,16 @@ function initializeTranscriptionList() {
     });
 }
 
+// Random (version 4) UUID; crypto.randomUUID is only available on secure origins
+function newRequestId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    const bytes = crypto.getRandomValues(new Uint8Array(16));
+    bytes[6] = (bytes[6] & 0x0f) | 0x40;
+    bytes[8] = (bytes[8] & 0x3f) | 0x80;
+    const hex = Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
 // Helper function to show alerts
 function showAlert(message, type = 'info') {
     const alertsContainer = document.getElementById('alertsContainer');
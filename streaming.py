@@ -0,0 +1,223 @@
+import os
+import time
+import logging
+import threading
+import subprocess
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from audio_decoder import FFMPEG_BINARY
+from noise_filter import BandpassFilter
+from recognizers import get_backend
+from segmentation import IncrementalSegmenter
+from transcription import (
+    TARGET_SAMPLE_RATE, SILENCE_SPLIT_PARAMS, RECOGNITION_PROCESS_CONCURRENCY,
+    pcm_to_audio_data, recognize_chunks,
+)
+
+logger = logging.getLogger(__name__)
+
+# Sessions idle for longer than this are torn down
+STREAM_SESSION_TTL = int(os.environ.get("STREAM_SESSION_TTL", "600"))
+# Live sessions a user may have open in this process; starting another one
+# aborts the oldest
+STREAM_SESSIONS_PER_USER = int(os.environ.get("STREAM_SESSIONS_PER_USER", "1"))
+# An open segment is closed after this long even if the speaker never pauses
+STREAM_MAX_SEGMENT_SECONDS = float(os.environ.get("STREAM_MAX_SEGMENT_SECONDS", "30"))
+# Short segments are merged up to this length; kept low so partial text stays fresh
+STREAM_TARGET_SEGMENT_SECONDS = float(os.environ.get("STREAM_TARGET_SEGMENT_SECONDS", "5"))
+READ_BLOCK = 8192
+
+_executor = ThreadPoolExecutor(max_workers=RECOGNITION_PROCESS_CONCURRENCY, thread_name_prefix="stream-recognize")
+
+class StreamingSession:
+    """
+    Incremental transcription of a recording that is still in progress.
+
+    Container fragments (e.g. the browser's 250 ms MediaRecorder chunks) are
+    piped into one long-running ffmpeg process that emits 16 kHz mono PCM.
+    The PCM is filtered as it arrives, and every speech segment followed by
+    enough silence is closed and recognized in the background. When the
+    recording stops only the final open segment is left to recognize.
+
+    Sessions live in the memory of the worker that created them, so all
+    requests of one session must reach the same process.
+    """
+
+    def __init__(self, user_id, noise_reduction=True, backend=None):
+        self.id = uuid4().hex
+        self.user_id = user_id
+        self.backend = backend if backend is not None and not isinstance(backend, str) else get_backend(backend)
+        self.filter = BandpassFilter(TARGET_SAMPLE_RATE) if noise_reduction else None
+        self.segmenter = IncrementalSegmenter(TARGET_SAMPLE_RATE, max_segment_seconds=STREAM_MAX_SEGMENT_SECONDS,
+                                              target_seconds=STREAM_TARGET_SEGMENT_SECONDS, **SILENCE_SPLIT_PARAMS)
+        self.segments = []  # futures of recognized segment texts, in order
+        self.last_seq = -1
+        self.last_activity = time.monotonic()
+        self.lock = threading.Lock()
+        # Orders fragments into the decoder. Separate from self.lock, which the
+        # reader needs while a write may be blocked on a full ffmpeg pipe.
+        self.write_lock = threading.Lock()
+        self.decoder = subprocess.Popen(
+            [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-probesize", "32768", "-i", "pipe:0",
+             "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(TARGET_SAMPLE_RATE), "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        self.reader = threading.Thread(target=self._read_pcm, name=f"stream-{self.id[:8]}", daemon=True)
+        self.reader.start()
+
+    @property
+    def segment_count(self):
+        return len(self.segments)
+
+    def write(self, fragment, seq=None):
+        """
+        Feed the next container fragment.
+
+        Args:
+            fragment (bytes): Raw fragment as produced by the recorder
+            seq (int): Optional sequence number; repeated fragments are ignored
+        """
+        with self.write_lock:
+            with self.lock:
+                self.last_activity = time.monotonic()
+                if seq is not None:
+                    if seq <= self.last_seq:
+                        logger.debug(f"Ignoring duplicate fragment {seq} for stream {self.id}")
+                        return
+                    self.last_seq = seq
+            if fragment:
+                self.decoder.stdin.write(fragment)
+                self.decoder.stdin.flush()
+
+    def partial_text(self):
+        """Return the text of the leading segments that are already recognized."""
+        texts = []
+        for future in list(self.segments):
+            if not future.done():
+                break
+            if future.result():
+                texts.append(future.result())
+        return " ".join(texts)
+
+    def finish(self):
+        """
+        Close the stream, recognize the last open segment and return the transcript.
+
+        Returns:
+            str: The full transcript, or "" if nothing was recognized
+        """
+        try:
+            self.decoder.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        self.reader.join()
+        self.decoder.wait()
+        with self.lock:
+            self._submit(self.segmenter.finish())
+        texts = [future.result() for future in self.segments]
+        transcript = " ".join(text for text in texts if text)
+        raw_count, raw_mean, count, mean = self.segmenter.stats()
+        logger.info(f"Stream {self.id} finished: {count} segments (avg {mean:.1f}s), coalesced from {raw_count} "
+                    f"(avg {raw_mean:.1f}s), {len(transcript)} characters")
+        return transcript
+
+    def abort(self):
+        """Tear down the decoder without recognizing pending audio."""
+        self.decoder.kill()
+        self.decoder.wait()
+        self.reader.join(timeout=5)
+        for pipe in (self.decoder.stdin, self.decoder.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        with self.lock:
+            cancelled = sum(future.cancel() for future in self.segments)
+        if cancelled:
+            logger.info(f"Stream {self.id}: cancelled {cancelled} pending segments")
+
+    def _read_pcm(self):
+        carry = b""
+        while True:
+            data = self.decoder.stdout.read1(READ_BLOCK)
+            if not data:
+                break
+            data = carry + data
+            usable = len(data) - len(data) % 2
+            carry = data[usable:]
+            samples = np.frombuffer(data[:usable], dtype=np.int16)
+            if self.filter:
+                samples = self.filter.process_pcm(samples)
+            with self.lock:
+                self._submit(self.segmenter.feed(samples))
+
+    def _submit(self, closed):
+        # Called with self.lock held
+        for _, _, samples in closed:
+            self.segments.append(_executor.submit(self._recognize, len(self.segments), samples))
+        if closed:
+            logger.debug(f"Stream {self.id}: closed {len(closed)} segments, {len(self.segments)} total")
+
+    def _recognize(self, index, samples):
+        audio_data = pcm_to_audio_data(samples, TARGET_SAMPLE_RATE)
+        return recognize_chunks([audio_data], max_workers=1, backend=self.backend, indices=[index])[0]
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_reaper = None
+
+def _expire_idle_sessions():
+    now = time.monotonic()
+    with _sessions_lock:
+        expired = [sid for sid, s in _sessions.items() if now - s.last_activity > STREAM_SESSION_TTL]
+        sessions = [_sessions.pop(sid) for sid in expired]
+    for session in sessions:
+        logger.info(f"Expiring idle stream {session.id}")
+        session.abort()
+
+def _reap_idle_sessions():
+    while True:
+        time.sleep(max(STREAM_SESSION_TTL / 4, 1))
+        _expire_idle_sessions()
+
+def _start_reaper():
+    # Expires sessions nobody polls anymore; started with the first session of the process
+    global _reaper
+    with _sessions_lock:
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap_idle_sessions, name="stream-reaper", daemon=True)
+            _reaper.start()
+
+def start_session(user_id, noise_reduction=True, backend=None):
+    """Create and register a streaming session for a user, aborting their oldest beyond STREAM_SESSIONS_PER_USER."""
+    _expire_idle_sessions()
+    _start_reaper()
+    session = StreamingSession(user_id, noise_reduction=noise_reduction, backend=backend)
+    with _sessions_lock:
+        # Sessions are kept in start order
+        own = [sid for sid, s in _sessions.items() if s.user_id == user_id]
+        replaced = [_sessions.pop(sid) for sid in own[:max(len(own) - STREAM_SESSIONS_PER_USER + 1, 0)]]
+        _sessions[session.id] = session
+    for old in replaced:
+        logger.info(f"Aborting stream {old.id}: user {user_id} started another one")
+        old.abort()
+    logger.info(f"Started stream {session.id} for user {user_id}")
+    return session
+
+def get_session(session_id, user_id):
+    """Return a user's live session, or None if it does not exist or has expired."""
+    _expire_idle_sessions()
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+    if session is None or session.user_id != user_id:
+        return None
+    return session
+
+def end_session(session_id, user_id):
+    """Unregister and return a user's live session, or None."""
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+        if session is None or session.user_id != user_id:
+            return None
+        return _sessions.pop(session_id)
@@ -1,74 +1,284 @@
+import os
+import sys
+import time
 import logging
+import threading
 import nltk
-import spacy
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 from collections import Counter
 from heapq import nlargest
-import string
 from sklearn.feature_extraction.text import TfidfVectorizer
 import re
+from config import env_flag
+from summary_batcher import SUMMARY_BATCHING_ENABLED, get_batcher
 
 logger = logging.getLogger(__name__)
-from transformers import pipeline
 
-# Initialize transformer summarizer once
-try:
-    transformer_summarizer = pipeline(
+TRANSFORMER_MODEL = "sshleifer/distilbart-cnn-12-6"
+SPACY_MODEL = "en_core_web_sm"
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords',
+}
+# Runtime of the summarization model: "pytorch" (the default transformers
+# pipeline), "onnx" (onnxruntime via optimum, from SUMMARIZER_MODEL_PATH) or
+# "int8" (dynamically quantized PyTorch). Falls back to "pytorch" if the
+# variant cannot be loaded.
+SUMMARIZER_VARIANT = os.environ.get("SUMMARIZER_VARIANT", "pytorch").lower()
+SUMMARIZER_MODEL_PATH = os.environ.get("SUMMARIZER_MODEL_PATH") or None
+# Whether a missing model may be downloaded when it is first needed. Nothing is
+# ever downloaded at import time.
+MODEL_DOWNLOADS_ENABLED = env_flag("MODEL_DOWNLOADS_ENABLED", True)
+# Seconds before a model that failed to load is tried again
+MODEL_RETRY_SECONDS = float(os.environ.get("MODEL_RETRY_SECONDS", "60"))
+
+# Models are loaded on first use, or ahead of time by warm_up()
+_models = {}
+_model_status = {}
+_retry_at = {}  # name -> time.monotonic() after which a failed load is tried again
+_background_loads = set()
+_background_lock = threading.Lock()
+_models_lock = threading.Lock()
+_transformer_variant = None
+
+def _transformer_cached():
+    try:
+        from huggingface_hub import try_to_load_from_cache
+    except ImportError:
+        return False
+    return isinstance(try_to_load_from_cache(TRANSFORMER_MODEL, "config.json"), str)
+
+def _load_pytorch_pipeline():
+    if not MODEL_DOWNLOADS_ENABLED and not _transformer_cached():
+        raise RuntimeError(f"Model '{TRANSFORMER_MODEL}' is not in the local cache and downloads are disabled")
+    from transformers import pipeline
+    return pipeline(
         "summarization",
-        model="sshleifer/distilbart-cnn-12-6",
+        model=TRANSFORMER_MODEL,
         device=-1  # CPU-only mode
     )
-except Exception as e:
-    transformer_summarizer = None
-    logger.error(f"Could not load transformer summarizer: {e}")
-
-
-# Load SpaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    logger.warning("SpaCy model 'en_core_web_sm' not found. Running download...")
-    import subprocess
-    subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
-    nlp = spacy.load("en_core_web_sm")
-
-# Download required NLTK resources
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
-
-def preprocess_text(text):
-    """
-    Preprocess text by removing punctuation, stopwords, and speech filler words.
-    Returns custom-split sentences and original sentences.
-    """
-    doc = nlp(text)
-    sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
-    if not sentences or len(sentences) == 1 and len(word_tokenize(sentences[0])) > 20:
-        text = re.sub(r'(?<=[.,;!?])\s+', ' ', text)  # Normalize spacing
-        sentences = re.split(r'[.;!?]+', text)  # Split at punctuation
-        sentences = [s.strip() for s in sentences if s.strip() and any(w.lower() not in stopwords.words('english') for w in word_tokenize(s))]
-        if not sentences:
-            words = word_tokenize(text)
-            sentences = [' '.join(words[i:i+15]) for i in range(0, len(words), 15) if any(w.lower() not in stopwords.words('english') for w in words[i:i+15])]
-    cleaned_sentences = []
-    stop_words = set(stopwords.words('english'))
-    speech_fillers = {'um', 'uh', 'like', 'you know', 'er', 'ah', 'hmm'}
-    stop_words.update(speech_fillers)
+
+def _load_onnx_pipeline(path):
+    # Requires optimum[onnxruntime] and a model exported with
+    # `optimum-cli export onnx --model sshleifer/distilbart-cnn-12-6 <path>`
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import AutoTokenizer, pipeline
+    model = ORTModelForSeq2SeqLM.from_pretrained(path, local_files_only=True)
+    tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+    return pipeline("summarization", model=model, tokenizer=tokenizer, device=-1)
+
+def _load_int8_pipeline(path):
+    # Dynamic int8 quantization of the Linear layers, done once at load time
+    import torch
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+    source = path or TRANSFORMER_MODEL
+    local_only = bool(path) or not MODEL_DOWNLOADS_ENABLED
+    model = AutoModelForSeq2SeqLM.from_pretrained(source, local_files_only=local_only)
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    tokenizer = AutoTokenizer.from_pretrained(source, local_files_only=local_only)
+    return pipeline("summarization", model=model, tokenizer=tokenizer, device=-1)
+
+SUMMARIZER_VARIANTS = {
+    "onnx": _load_onnx_pipeline,
+    "int8": _load_int8_pipeline,
+}
+
+def load_summarizer_variant(variant, path=None):
+    """
+    Load a summarization pipeline for a variant: "pytorch", "onnx" or "int8".
+    
+    Args:
+        variant (str): Runtime of the model
+        path (str): Local model directory. Required for "onnx"; "int8"
+            quantizes TRANSFORMER_MODEL when it is not given.
+    """
+    if variant == "pytorch":
+        return _load_pytorch_pipeline()
+    if variant not in SUMMARIZER_VARIANTS:
+        raise ValueError(f"Unknown summarizer variant '{variant}'. Available: pytorch, {', '.join(SUMMARIZER_VARIANTS)}")
+    if variant == "onnx" and not path:
+        raise ValueError("The onnx summarizer needs SUMMARIZER_MODEL_PATH")
+    return SUMMARIZER_VARIANTS[variant](path)
+
+def _load_transformer():
+    global _transformer_variant
+    if SUMMARIZER_VARIANT != "pytorch":
+        try:
+            summarizer = load_summarizer_variant(SUMMARIZER_VARIANT, SUMMARIZER_MODEL_PATH)
+            _transformer_variant = SUMMARIZER_VARIANT
+            return summarizer
+        except Exception as e:
+            logger.warning(f"Could not load {SUMMARIZER_VARIANT} summarizer, using the PyTorch pipeline: {e}")
+    summarizer = _load_pytorch_pipeline()
+    _transformer_variant = "pytorch"
+    return summarizer
+
+def transformer_model_name():
+    """Return the summarization model name including the runtime variant that was loaded."""
+    variant = _transformer_variant or SUMMARIZER_VARIANT
+    return TRANSFORMER_MODEL if variant == "pytorch" else f"{TRANSFORMER_MODEL}+{variant}"
+
+def _load_spacy():
+    import spacy
+    try:
+        return spacy.load(SPACY_MODEL)
+    except OSError:
+        if not MODEL_DOWNLOADS_ENABLED:
+            raise
+        logger.warning(f"SpaCy model '{SPACY_MODEL}' not found. Running download...")
+        import subprocess
+        subprocess.run([sys.executable, "-m", "spacy", "download", SPACY_MODEL])
+        return spacy.load(SPACY_MODEL)
+
+def _load_nltk():
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            if not MODEL_DOWNLOADS_ENABLED:
+                raise LookupError(f"NLTK resource '{name}' is missing and downloads are disabled")
+            nltk.download(name)
+    return True
+
+# name -> (loader, required). The transformer is optional because summaries
+# fall back to the extractive method without it.
+MODEL_LOADERS = {
+    "transformer": (_load_transformer, False),
+    "spacy": (_load_spacy, True),
+    "nltk": (_load_nltk, True),
+}
+
+def get_model(name):
+    """
+    Return a loaded model, loading it on first use.
+    
+    A model that failed to load returns None until MODEL_RETRY_SECONDS have
+    passed; the next call after that tries to load it again.
+    """
+    model = _models.get(name)
+    if model is not None or not _retry_due(name):
+        return model
+    with _models_lock:
+        if _models.get(name) is None and _retry_due(name):
+            loader, _ = MODEL_LOADERS[name]
+            started = time.perf_counter()
+            try:
+                _models[name] = loader()
+                error = None
+                _retry_at.pop(name, None)
+            except Exception as e:
+                _models[name] = None
+                error = str(e)
+                _retry_at[name] = time.monotonic() + MODEL_RETRY_SECONDS
+                logger.error(f"Could not load {name} model, retrying in {MODEL_RETRY_SECONDS:.0f}s: {e}")
+            elapsed = time.perf_counter() - started
+            _model_status[name] = {"loaded": error is None, "load_seconds": round(elapsed, 3), "error": error}
+            logger.info(f"Loaded {name} model in {elapsed:.2f}s" if error is None else f"Loading {name} model failed after {elapsed:.2f}s")
+    return _models.get(name)
+
+def _retry_due(name):
+    return time.monotonic() >= _retry_at.get(name, 0)
+
+def model_available(name):
+    """Whether a model is loaded or may still load (not waiting to retry a failed load), without loading it."""
+    return _models.get(name) is not None or _retry_due(name)
+
+def load_in_background(name):
+    """Start loading a model in a daemon thread, unless it is loaded, loading or waiting to retry."""
+    if _models.get(name) is not None or not _retry_due(name):
+        return
+    with _background_lock:
+        if name in _background_loads:
+            return
+        _background_loads.add(name)
+
+    def _load():
+        try:
+            get_model(name)
+        finally:
+            with _background_lock:
+                _background_loads.discard(name)
+    threading.Thread(target=_load, name=f"load-{name}", daemon=True).start()
+    logger.info(f"Loading {name} model in the background")
+
+def get_transformer_summarizer():
+    return get_model("transformer")
+
+def get_nlp():
+    nlp = get_model("spacy")
+    if nlp is None:
+        raise RuntimeError(f"SpaCy model '{SPACY_MODEL}' is not available")
+    return nlp
+
+def ensure_nltk():
+    if not get_model("nltk"):
+        raise RuntimeError("NLTK data is not available")
+
+def warm_up():
+    """
+    Load every model now instead of on first use.
+    
+    Call before forking web workers (e.g. under gunicorn --preload) so workers
+    share the loaded models and no request pays the load time.
+    
+    Returns:
+        dict: model_status() after loading
+    """
+    for name in MODEL_LOADERS:
+        get_model(name)
+    return model_status()
+
+def check_assets():
+    """
+    Report which model assets are present locally, without loading or downloading anything.
     
-    for sent in sentences:
-        words = word_tokenize(sent)
-        words = [word for word in words if word not in string.punctuation]
-        words = [word for word in words if word.lower() not in stop_words]
-        cleaned_sent = ' '.join(words)
-        if cleaned_sent:
-            cleaned_sentences.append(cleaned_sent)
+    Returns:
+        dict: Asset name -> True if available offline
+    """
+    assets = {}
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+            assets[f"nltk:{name}"] = True
+        except LookupError:
+            assets[f"nltk:{name}"] = False
+    try:
+        import spacy.util
+        assets[f"spacy:{SPACY_MODEL}"] = spacy.util.is_package(SPACY_MODEL)
+    except ImportError:
+        assets[f"spacy:{SPACY_MODEL}"] = False
+    assets[f"transformer:{TRANSFORMER_MODEL}"] = _transformer_cached()
+    return assets
+
+def model_status():
+    """
+    Return load state and load time per model, and whether the required ones are ready.
+    
+    Models are loaded lazily unless PRELOAD_MODELS is set, so a required model
+    that is not loaded yet counts as ready when its assets are available
+    offline (check_assets) and it is not waiting to retry a failed load.
     
-    return sentences, cleaned_sentences
+    Returns:
+        dict: {"ready": bool, "models": {name: {"loaded", "load_seconds", "error", "required"}}}
+    """
+    with _models_lock:
+        status = {name: dict(_model_status.get(name, {"loaded": False, "load_seconds": None, "error": None}))
+                  for name in MODEL_LOADERS}
+    for name, (_, required) in MODEL_LOADERS.items():
+        status[name]["required"] = required
+    status["transformer"]["variant"] = _transformer_variant
+    pending = [name for name, entry in status.items() if entry["required"] and not entry["loaded"]]
+    assets = check_assets() if pending else {}
+    ready = all(_retry_due(name) and all(present for asset, present in assets.items() if asset.startswith(f"{name}:"))
+                for name in pending)
+    return {"ready": ready, "models": status}
+
+# Pipeline components doc.sents depends on; the extractive summarizer skips the rest
+SENTENCE_COMPONENTS = frozenset({'tok2vec', 'transformer', 'parser', 'senter', 'sentencizer'})
+
+def unused_components(nlp):
+    """Names of the pipeline components that do not contribute to sentence boundaries."""
+    return [name for name in nlp.pipe_names if name not in SENTENCE_COMPONENTS]
 
 def extract_keywords(doc, pos_tags=['PROPN', 'NOUN', 'VERB', 'ADJ']):
     """
@@ -89,81 +299,277 @@ def calculate_frequencies(keywords):
         freq[key] = freq[key] / max_freq
     return freq
 
-def score_sentences(doc, sentences):
-    """
-    Score sentences using TF-IDF for better keyword weighting.
-    Returns a dictionary mapping sentences to scores.
-    """
-    valid_sents = [sent for sent in doc.sents if sent.text.strip() in sentences]
-    if not valid_sents:
-        valid_sents = [doc[s.start:s.end] for s in doc.sents if s.text.strip()]
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform([sent.text for sent in valid_sents])
-    scores = tfidf_matrix.sum(axis=1).A1 / tfidf_matrix.sum(axis=1).A1.max()  # Normalize scores
-    sent_strength = {sent: score for sent, score in zip(valid_sents, scores) if score > 0.05}  # Lowered threshold
-    return sent_strength
+REDUNDANT_PHRASES = ('um', 'uh', 'like', 'you know', 'quant mechanics', 'subatomic particl', 'my classical physics practical')
+CORRECTIONS = {'es': 'as', 'col': 'collapse', 'distancas': 'distances', 'Momentum': 'momentum', 'describe': 'describes'}
 
-def clean_summary(sentences):
-    """
-    Clean summary by removing redundant phrases and correcting errors.
-    Returns a list of cleaned sentence strings.
-    """
+def _clean_sentence_texts(texts):
     cleaned_sentences = []
-    redundant_phrases = ['um', 'uh', 'like', 'you know', 'quant mechanics', 'subatomic particl', 'my classical physics practical']
-    corrections = {'es': 'as', 'col': 'collapse', 'distancas': 'distances', 'Momentum': 'momentum', 'describe': 'describes'}
-    for sent in sentences:
-        sent_text = sent.text.strip()
-        for phrase in redundant_phrases:
+    for sent_text in texts:
+        for phrase in REDUNDANT_PHRASES:
             sent_text = sent_text.replace(phrase, '')
-        for err, corr in corrections.items():
+        for err, corr in CORRECTIONS.items():
             sent_text = sent_text.replace(err, corr)
         sent_text = ' '.join(sent_text.split())
         if sent_text:
             cleaned_sentences.append(sent_text)
     return cleaned_sentences
 
-def generate_summary(text, percent=0.2, max_length=130):
+# Hierarchical summarization: long inputs are split into token-bounded windows,
+# each window is summarized (map) and the joined summaries are summarized again
+# (reduce) until they fit into one window.
+SUMMARY_WINDOW_TOKENS = int(os.environ.get("SUMMARY_WINDOW_TOKENS", "1000"))
+SUMMARY_MAP_MAX_LENGTH = int(os.environ.get("SUMMARY_MAP_MAX_LENGTH", "150"))
+SUMMARY_BATCH_SIZE = int(os.environ.get("SUMMARY_BATCH_SIZE", "4"))
+SUMMARY_MAX_LEVELS = int(os.environ.get("SUMMARY_MAX_LEVELS", "4"))
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+def split_into_windows(text, tokenizer, max_tokens=SUMMARY_WINDOW_TOKENS):
+    """
+    Pack consecutive sentences into windows of at most max_tokens model tokens.
+    
+    Sentences longer than a window are cut at token boundaries.
+    
+    Args:
+        text (str): Text to split
+        tokenizer: The summarization model's tokenizer
+        max_tokens (int): Token budget per window, excluding special tokens
+        
+    Returns:
+        list[str]: Windows in order
+    """
+    sentences = [s for s in SENTENCE_BOUNDARY.split(text) if s.strip()]
+    if not sentences:
+        return []
+    token_ids = tokenizer(sentences, add_special_tokens=False)['input_ids']
+    windows, current, current_tokens = [], [], 0
+    for sentence, ids in zip(sentences, token_ids):
+        if len(ids) > max_tokens:
+            pieces = [tokenizer.decode(ids[i:i + max_tokens]) for i in range(0, len(ids), max_tokens)]
+            pieces_tokens = [min(max_tokens, len(ids) - i) for i in range(0, len(ids), max_tokens)]
+        else:
+            pieces, pieces_tokens = [sentence], [len(ids)]
+        for piece, n_tokens in zip(pieces, pieces_tokens):
+            if current and current_tokens + n_tokens > max_tokens:
+                windows.append(' '.join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += n_tokens
+    if current:
+        windows.append(' '.join(current))
+    return windows
+
+def _summarize_texts(summarizer, texts, max_length, min_length):
+    # Route through the shared micro-batcher so texts of concurrent requests
+    # share model calls, or batch only this caller's texts
+    if SUMMARY_BATCHING_ENABLED:
+        return get_batcher(summarizer).summarize(texts, max_length, min_length)
+    outputs = summarizer(texts, max_length=max_length, min_length=min_length,
+                         do_sample=False, truncation=True, batch_size=SUMMARY_BATCH_SIZE)
+    return [output['summary_text'] for output in outputs]
+
+def summarize_hierarchical(text, summarizer, max_length=130, min_length=30):
+    """
+    Summarize text of any length with map-reduce over token-bounded windows.
+    
+    Each level summarizes its windows in batched model calls (shared with
+    concurrent callers when micro-batching is enabled). Levels repeat
+    until the text fits into a single window, which is then summarized to
+    max_length. Text that already fits takes a single model call.
+    
+    Args:
+        text (str): Text to summarize
+        summarizer: transformers summarization pipeline
+        max_length (int): Token length limit of the final summary
+        min_length (int): Minimum token length of the final summary
+        
+    Returns:
+        str: The summary
+    """
+    tokenizer = summarizer.tokenizer
+    map_min_length = min(min_length, SUMMARY_MAP_MAX_LENGTH // 4)
+    for level in range(SUMMARY_MAX_LEVELS):
+        windows = split_into_windows(text, tokenizer)
+        if len(windows) <= 1:
+            break
+        started = time.perf_counter()
+        outputs = _summarize_texts(summarizer, windows, SUMMARY_MAP_MAX_LENGTH, map_min_length)
+        reduced = ' '.join(output.strip() for output in outputs)
+        logger.info(f"Summary level {level + 1}: {len(windows)} windows, {len(text.split())} -> "
+                    f"{len(reduced.split())} words in {time.perf_counter() - started:.2f}s")
+        if len(reduced) >= len(text):
+            logger.warning("Summary level did not shrink the text, stopping reduction")
+            break
+        text = reduced
+    started = time.perf_counter()
+    summary = _summarize_texts(summarizer, [text], max_length, min_length)[0]
+    logger.info(f"Final summary of {len(text.split())} words in {time.perf_counter() - started:.2f}s")
+    return summary
+
+# Deadline-aware strategy: the transformer is skipped when its estimated time
+# for a text does not fit the caller's deadline. The estimate scales the
+# measured throughput (words per second, exponentially averaged) by the number
+# of transformer calls already running in this process.
+SUMMARY_DEADLINE_SECONDS = float(os.environ.get("SUMMARY_DEADLINE_SECONDS", "0"))  # 0 means no deadline
+SUMMARY_PRIOR_WORDS_PER_SECOND = float(os.environ.get("SUMMARY_PRIOR_WORDS_PER_SECOND", "150"))
+THROUGHPUT_SMOOTHING = 0.2
+_throughput = {"words_per_second": None, "calls": 0, "in_flight": 0}
+_throughput_lock = threading.Lock()
+
+def throughput_stats():
+    """Return the measured transformer throughput and the calls currently running."""
+    with _throughput_lock:
+        return dict(_throughput)
+
+def _record_throughput(words, seconds):
+    if seconds <= 0:
+        return
+    rate = words / seconds
+    with _throughput_lock:
+        previous = _throughput["words_per_second"]
+        _throughput["words_per_second"] = rate if previous is None else (
+            THROUGHPUT_SMOOTHING * rate + (1 - THROUGHPUT_SMOOTHING) * previous)
+        _throughput["calls"] += 1
+
+def estimate_transformer_seconds(text):
+    """Estimate how long the transformer would take to summarize text right now."""
+    with _throughput_lock:
+        rate = _throughput["words_per_second"] or SUMMARY_PRIOR_WORDS_PER_SECOND
+        in_flight = _throughput["in_flight"]
+    return len(text.split()) / rate * (1 + in_flight)
+
+def choose_summary_method(text, deadline=None):
+    """
+    Return the method generate_summary will use for text: "transformer" or "extractive".
+    
+    With a deadline this never waits for the transformer to load, which can
+    take longer than the deadline itself: until it is loaded, the extractive
+    method is chosen and the model is loaded in the background.
+    
+    Args:
+        text (str): Text to summarize
+        deadline (float): Latency budget in seconds, None or 0 for no limit
+    """
+    if deadline and _models.get("transformer") is None:
+        load_in_background("transformer")
+        return "extractive"
+    if not get_transformer_summarizer():
+        logger.warning("Transformer summarizer not available. Falling back.")
+        return "extractive"
+    if deadline:
+        estimate = estimate_transformer_seconds(text)
+        if estimate > deadline:
+            logger.info(f"Transformer estimated at {estimate:.1f}s, over the {deadline:.1f}s deadline; using extractive")
+            return "extractive"
+    return "transformer"
+
+def generate_summary(text, percent=0.2, max_length=130, deadline=None):
     """
     Generate summary using a small Transformer model for better results.
-    Falls back to extractive method if transformer fails.
+    Long texts are summarized hierarchically instead of being truncated.
+    Falls back to extractive method if transformer fails, or if it is not
+    expected to finish within deadline seconds.
+    """
+    return generate_summary_with_method(text, percent=percent, max_length=max_length, deadline=deadline)[0]
+
+def generate_summary_with_method(text, percent=0.2, max_length=130, deadline=None):
+    """
+    Like generate_summary, but also report the method that produced the summary.
+    
+    Returns:
+        tuple[str, str]: The summary and "transformer", "extractive", "truncated"
+            (both summarizers failed) or "none" (empty input)
     """
     if not text or not text.strip():
         logger.warning("Empty or whitespace-only text provided for summarization")
-        return ""
+        return "", "none"
 
-    # Clean up and trim input
+    # Clean up input
     text = text.strip().replace('\n', ' ')
-    input_limit = 800  # tokens limit for small models
-    words = text.split()
-    if len(words) > input_limit:
-        text = ' '.join(words[:input_limit])
 
     try:
-        if transformer_summarizer:
+        if choose_summary_method(text, deadline) == "transformer":
+            transformer_summarizer = get_transformer_summarizer()
             logger.info("Using Transformer-based summarizer")
-            summary = transformer_summarizer(text, max_length=max_length, min_length=30, do_sample=False)
-            return summary[0]['summary_text']
-        else:
-            logger.warning("Transformer summarizer not available. Falling back.")
+            with _throughput_lock:
+                _throughput["in_flight"] += 1
+            started = time.perf_counter()
+            try:
+                summary = summarize_hierarchical(text, transformer_summarizer, max_length=max_length)
+            finally:
+                with _throughput_lock:
+                    _throughput["in_flight"] -= 1
+            _record_throughput(len(text.split()), time.perf_counter() - started)
+            return summary, "transformer"
     except Exception as e:
         logger.error(f"Transformer summarization failed: {e}")
 
-    # Fallback to your extractive method
+    # Fallback to your extractive method over the whole text, so sentences
+    # from anywhere in a long recording can be picked
     logger.info("Falling back to extractive summarization")
-    return extractive_summary_fallback(text, max_length=max_length)
+    try:
+        return _extractive_summary(text, max_length), "extractive"
+    except Exception as e:
+        logger.error(f"Fallback summarization failed: {e}")
+        return text[:max_length] + "...", "truncated"
+
 
+def _extractive_summary(text, max_length, doc=None):
+    """
+    Pick the two highest scoring sentences of one parse of the text.
+    
+    Sentences are tracked by their index in the parse, and only non-empty
+    sentences are scored.
+    """
+    if doc is None:
+        nlp = get_nlp()
+        doc = nlp(text, disable=unused_components(nlp))
+    sentence_texts = [sent.text for sent in doc.sents]
+    indices = [i for i, sent_text in enumerate(sentence_texts) if sent_text.strip()]
+    tfidf_matrix = TfidfVectorizer().fit_transform([sentence_texts[i] for i in indices])
+    row_sums = tfidf_matrix.sum(axis=1).A1
+    scores = row_sums / row_sums.max()  # Normalize scores
+    ranked = [(i, score) for i, score in zip(indices, scores) if score > 0.05]
+    top = nlargest(2, ranked, key=lambda item: item[1])
+    summary = ' '.join(_clean_sentence_texts(sentence_texts[i].strip() for i, _ in top))
+    return summary[:max_length] + "..." if len(summary) > max_length else summary
 
 def extractive_summary_fallback(text, max_length=300):
     """
     Your existing fallback extractive summarization logic (can reuse your earlier logic here).
     """
     try:
-        doc = nlp(text)
-        sentences, _ = preprocess_text(text)
-        sent_strength = score_sentences(doc, sentences)
-        top_sentences = nlargest(2, sent_strength, key=sent_strength.get)
-        summary = ' '.join(clean_summary(top_sentences))
-        return summary[:max_length] + "..." if len(summary) > max_length else summary
+        return _extractive_summary(text, max_length)
     except Exception as e:
         logger.error(f"Fallback summarization failed: {e}")
         return text[:max_length] + "..."
+
+# nlp.pipe settings for extractive_summaries
+EXTRACTIVE_BATCH_SIZE = int(os.environ.get("EXTRACTIVE_BATCH_SIZE", "32"))
+EXTRACTIVE_N_PROCESS = int(os.environ.get("EXTRACTIVE_N_PROCESS", "1"))
+
+def extractive_summaries(texts, max_length=300, batch_size=None, n_process=None):
+    """
+    Summarize many texts with the extractive method, yielding summaries lazily.
+    
+    Texts are streamed through nlp.pipe with the components the summarizer
+    does not use disabled, so only batch_size documents are held at a time.
+    Each summary equals extractive_summary_fallback(text, max_length).
+    
+    Args:
+        texts (iterable[str]): Texts to summarize, consumed lazily
+        max_length (int): Character limit of each summary
+        batch_size (int): Documents per nlp.pipe batch, defaults to EXTRACTIVE_BATCH_SIZE
+        n_process (int): Parser processes, defaults to EXTRACTIVE_N_PROCESS
+        
+    Yields:
+        str: One summary per text, in order
+    """
+    nlp = get_nlp()
+    docs = nlp.pipe(((text, text) for text in texts), as_tuples=True, disable=unused_components(nlp),
+                    batch_size=batch_size or EXTRACTIVE_BATCH_SIZE, n_process=n_process or EXTRACTIVE_N_PROCESS)
+    for doc, text in docs:
+        try:
+            yield _extractive_summary(text, max_length, doc=doc)
+        except Exception as e:
+            logger.error(f"Fallback summarization failed: {e}")
+            yield text[:max_length] + "..."
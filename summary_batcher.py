@@ -0,0 +1,140 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from concurrent.futures import Future
+from config import env_flag
+
+logger = logging.getLogger(__name__)
+
+# Collect summarization calls for up to SUMMARY_BATCH_WAIT_MS, or until
+# SUMMARY_BATCH_MAX_ITEMS texts of similar length are waiting, and run them
+# as one model call.
+SUMMARY_BATCHING_ENABLED = env_flag("SUMMARY_BATCHING_ENABLED", True)
+SUMMARY_BATCH_WAIT_MS = float(os.environ.get("SUMMARY_BATCH_WAIT_MS", "20"))
+SUMMARY_BATCH_MAX_ITEMS = int(os.environ.get("SUMMARY_BATCH_MAX_ITEMS", "8"))
+# Word-count edges of the length buckets, so short texts are not padded to long ones
+SUMMARY_BUCKET_EDGES = [int(edge) for edge in os.environ.get("SUMMARY_BUCKET_EDGES", "100,300,600").split(",") if edge]
+
+class _Item:
+    __slots__ = ("text", "future", "enqueued")
+
+    def __init__(self, text):
+        self.text = text
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+class SummaryBatcher:
+    """
+    Micro-batching front end for a summarization pipeline.
+
+    Callers on any thread submit texts and block on per-text futures. A
+    single dispatcher thread groups waiting texts by generation settings and
+    length bucket, and runs each group as one batched model call once it is
+    full or its oldest text has waited max_wait_ms.
+    """
+
+    def __init__(self, summarizer, max_wait_ms=SUMMARY_BATCH_WAIT_MS, max_items=SUMMARY_BATCH_MAX_ITEMS,
+                 bucket_edges=SUMMARY_BUCKET_EDGES):
+        self.summarizer = summarizer
+        self.max_wait = max_wait_ms / 1000
+        self.max_items = max(1, max_items)
+        self.bucket_edges = sorted(bucket_edges)
+        self.buckets = {}  # (max_length, min_length, bucket) -> list of _Item
+        self.condition = threading.Condition()
+        self.stats = {"batches": 0, "items": 0, "max_batch_size": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+        self.thread = threading.Thread(target=self._run, name="summary-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, text, max_length, min_length):
+        """Queue one text and return a Future of its summary text."""
+        item = _Item(text)
+        key = (max_length, min_length, bisect.bisect_left(self.bucket_edges, len(text.split())))
+        with self.condition:
+            self.buckets.setdefault(key, []).append(item)
+            self.condition.notify()
+        return item.future
+
+    def summarize(self, texts, max_length, min_length):
+        """
+        Summarize texts, batched together with other callers' texts.
+
+        Returns:
+            list[str]: One summary per text, in order
+        """
+        futures = [self.submit(text, max_length, min_length) for text in texts]
+        return [future.result() for future in futures]
+
+    def batch_stats(self):
+        """Return batch counts, batch sizes, queue wait times and the current queue length."""
+        with self.condition:
+            stats = dict(self.stats)
+            stats["queued"] = sum(len(items) for items in self.buckets.values())
+        stats["mean_batch_size"] = stats["items"] / stats["batches"] if stats["batches"] else 0.0
+        stats["mean_wait_ms"] = stats.pop("total_wait_ms") / stats["items"] if stats["items"] else 0.0
+        return stats
+
+    def _next_batch(self):
+        # Called with the condition held. Returns (key, items) or the seconds to wait.
+        now = time.monotonic()
+        wait = None
+        for key, items in self.buckets.items():
+            remaining = items[0].enqueued + self.max_wait - now
+            if len(items) >= self.max_items or remaining <= 0:
+                batch = items[:self.max_items]
+                del items[:self.max_items]
+                if not items:
+                    del self.buckets[key]
+                return key, batch
+            wait = remaining if wait is None else min(wait, remaining)
+        return wait
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    batch = self._next_batch()
+                    if isinstance(batch, tuple):
+                        break
+                    self.condition.wait(batch)
+                (max_length, min_length, _), items = batch
+                now = time.monotonic()
+                waits = [(now - item.enqueued) * 1000 for item in items]
+                self.stats["batches"] += 1
+                self.stats["items"] += len(items)
+                self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(items))
+                self.stats["total_wait_ms"] += sum(waits)
+                self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], max(waits))
+            self._run_batch(items, max_length, min_length, max(waits))
+
+    def _run_batch(self, items, max_length, min_length, max_wait_ms):
+        started = time.perf_counter()
+        try:
+            outputs = self.summarizer([item.text for item in items], max_length=max_length, min_length=min_length,
+                                      do_sample=False, truncation=True, batch_size=len(items))
+        except Exception as e:
+            for item in items:
+                item.future.set_exception(e)
+            return
+        for item, output in zip(items, outputs):
+            item.future.set_result(output['summary_text'])
+        logger.debug(f"Summarized batch of {len(items)} in {time.perf_counter() - started:.2f}s "
+                     f"(oldest waited {max_wait_ms:.0f} ms)")
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+def get_batcher(summarizer):
+    """Return the shared batcher of a summarization pipeline."""
+    with _batchers_lock:
+        if id(summarizer) not in _batchers:
+            _batchers[id(summarizer)] = SummaryBatcher(summarizer)
+            logger.info(f"Started summary batcher: wait {SUMMARY_BATCH_WAIT_MS} ms, up to {SUMMARY_BATCH_MAX_ITEMS} items")
+        return _batchers[id(summarizer)]
+
+def batcher_stats():
+    """Return the stats of every batcher in this process."""
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+    return [batcher.batch_stats() for batcher in batchers]
@@ -0,0 +1,121 @@
+import os
+import hashlib
+import logging
+import datetime
+from app import db
+from config import env_flag
+from counters import HitCounters
+from models import SummaryCache
+from summarization import SPACY_MODEL, transformer_model_name, model_available, choose_summary_method, generate_summary_with_method
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_ENABLED = env_flag("SUMMARY_CACHE_ENABLED", True)
+# Number of cached summaries before least recently used entries are evicted
+SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get("SUMMARY_CACHE_MAX_ENTRIES", "10000"))
+EVICTION_BATCH = 100
+
+_counters = HitCounters("evictions")
+
+def cache_stats():
+    """Return this process's hit/miss/eviction counters and the hit rate."""
+    return _counters.snapshot()
+
+def normalize_text(text):
+    """Collapse whitespace so formatting-only edits map to the same entry."""
+    return ' '.join(text.split())
+
+def cache_key(text, max_length, method):
+    """Hash normalized text together with the settings that affect the summary."""
+    digest = hashlib.sha256(normalize_text(text).encode())
+    model_name = transformer_model_name() if method == "transformer" else SPACY_MODEL
+    digest.update(f"|{max_length}|{model_name}|{method}".encode())
+    return digest.hexdigest()
+
+def lookup(key, count_miss=True):
+    """Return the cached summary for a key, or None on a miss."""
+    entry = db.session.get(SummaryCache, key)
+    if entry is None:
+        if count_miss:
+            _counters.count("misses")
+        return None
+    _counters.count("hits")
+    entry.hit_count += 1
+    entry.last_used_at = datetime.datetime.utcnow()
+    db.session.commit()
+    return entry.summary_text
+
+def store(key, summary_text, method):
+    """Insert or replace a cache entry, then evict down to SUMMARY_CACHE_MAX_ENTRIES."""
+    entry = db.session.get(SummaryCache, key) or SummaryCache(key=key, hit_count=0)
+    entry.summary_text = summary_text
+    entry.method = method
+    entry.last_used_at = datetime.datetime.utcnow()
+    db.session.add(entry)
+    db.session.commit()
+    evict()
+
+def evict(max_entries=None):
+    """Delete least recently used entries until at most max_entries remain."""
+    max_entries = SUMMARY_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    excess = SummaryCache.query.count() - max_entries
+    evicted = 0
+    while excess > 0:
+        oldest = SummaryCache.query.order_by(SummaryCache.last_used_at.asc()).limit(min(excess, EVICTION_BATCH)).all()
+        if not oldest:
+            break
+        for entry in oldest:
+            db.session.delete(entry)
+        db.session.commit()
+        excess -= len(oldest)
+        evicted += len(oldest)
+    if evicted:
+        _counters.count("evictions", evicted)
+        logger.info(f"Evicted {evicted} summary cache entries")
+
+def _safe_lookup(key, count_miss=True):
+    try:
+        return lookup(key, count_miss=count_miss)
+    except Exception as e:
+        logger.error(f"Summary cache lookup failed: {str(e)}")
+        db.session.rollback()
+        return None
+
+def cached_summary(text, max_length=130, deadline=None):
+    """
+    Summarize text, reusing a previous summary of the same text and settings.
+
+    Accepts the same arguments as summarization.generate_summary. Only
+    summaries produced by the method the key was computed for are stored, so
+    a transient transformer failure never caches an extractive result under
+    the transformer's key. When the deadline rules out the transformer, a
+    cached transformer summary is still preferred over a fresh extractive one.
+
+    Returns:
+        tuple[str, str]: The summary and the method that produced it
+    """
+    if not SUMMARY_CACHE_ENABLED or not text or not text.strip():
+        return generate_summary_with_method(text, max_length=max_length, deadline=deadline)
+    method = choose_summary_method(text, deadline)
+    if method != "transformer" and model_available("transformer"):
+        cached = _safe_lookup(cache_key(text, max_length, "transformer"), count_miss=False)
+        if cached is not None:
+            return cached, "transformer"
+    key = cache_key(text, max_length, method)
+    cached = _safe_lookup(key)
+    if cached is not None:
+        logger.info(f"Summary cache hit for {key[:12]}")
+        return cached, method
+
+    summary, used = generate_summary_with_method(text, max_length=max_length, deadline=deadline)
+    if used == method and summary:
+        try:
+            store(key, summary, method)
+        except Exception as e:
+            logger.error(f"Summary cache store failed: {str(e)}")
+            db.session.rollback()
+    return summary, used
+
+def summarize_with_cache(text, max_length=130, deadline=None):
+    """Like cached_summary, returning only the summary."""
+    return cached_summary(text, max_length=max_length, deadline=deadline)[0]
@@ -0,0 +1,73 @@
+import os
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app import db
+from config import env_flag
+from models import Transcription
+from summarization import SUMMARY_DEADLINE_SECONDS, model_available
+from summary_cache import cached_summary
+
+logger = logging.getLogger(__name__)
+
+# Replace summaries served by the fast extractive path with a transformer
+# summary in the background
+SUMMARY_UPGRADE_ENABLED = env_flag("SUMMARY_UPGRADE_ENABLED", True)
+SUMMARY_UPGRADE_WORKERS = int(os.environ.get("SUMMARY_UPGRADE_WORKERS", "1"))
+
+_executor = ThreadPoolExecutor(max_workers=SUMMARY_UPGRADE_WORKERS, thread_name_prefix="summary-upgrade")
+
+def summarize_within_deadline(text, max_length=130, deadline=None):
+    """
+    Summarize text for an HTTP request within a latency budget.
+
+    Args:
+        text (str): Text to summarize
+        max_length (int): Summary length limit
+        deadline (float): Seconds, defaults to SUMMARY_DEADLINE_SECONDS (0 means none)
+
+    Returns:
+        tuple[str, bool]: The summary and whether it was degraded to the
+            extractive method although the transformer is available
+    """
+    deadline = SUMMARY_DEADLINE_SECONDS if deadline is None else deadline
+    summary, method = cached_summary(text, max_length=max_length, deadline=deadline)
+    # Checked without loading the model; the upgrade loads it if needed
+    degraded = method == "extractive" and bool(deadline) and model_available("transformer")
+    return summary, degraded
+
+def schedule_upgrade(transcription_id, text, fast_summary, max_length=130):
+    """
+    Queue a transformer summary to replace a degraded one.
+
+    The stored summary is only replaced while it still equals fast_summary,
+    so edits made in the meantime are kept.
+
+    Returns:
+        Future | None: The background job, or None when upgrades are disabled
+    """
+    if not SUMMARY_UPGRADE_ENABLED:
+        return None
+    logger.info(f"Queued transformer summary upgrade of transcription {transcription_id}")
+    app = current_app._get_current_object()
+    return _executor.submit(_upgrade, app, transcription_id, text, fast_summary, max_length)
+
+def _upgrade(app, transcription_id, text, fast_summary, max_length):
+    with app.app_context():
+        try:
+            summary, method = cached_summary(text, max_length=max_length)
+            if method != "transformer":
+                logger.warning(f"Summary upgrade of transcription {transcription_id} got {method}, keeping the current summary")
+                return False
+            updated = Transcription.query.filter_by(id=transcription_id, summary_text=fast_summary) \
+                .update({"summary_text": summary}, synchronize_session=False)
+            db.session.commit()
+            logger.info(f"Summary upgrade of transcription {transcription_id}: {'saved' if updated else 'skipped, summary changed'}")
+            return bool(updated)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Summary upgrade of transcription {transcription_id} failed: {str(e)} with traceback: {traceback.format_exc()}")
+            return False
+        finally:
+            db.session.remove()
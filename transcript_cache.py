@@ -0,0 +1,161 @@
+import os
+import json
+import hashlib
+import logging
+import datetime
+from sqlalchemy import func
+from app import db
+from config import env_flag
+from counters import HitCounters
+from models import TranscriptCache
+from recognizers import get_backend
+from audio_decoder import iter_raw_blocks, replayable
+from transcription import TARGET_SAMPLE_RATE, transcribe_stream
+from checkpoints import transcribe_resumable, clear_checkpoints
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_CACHE_ENABLED = env_flag("TRANSCRIPT_CACHE_ENABLED", True)
+# Total size of cached transcripts before least recently used entries are evicted
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.environ.get("TRANSCRIPT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+EVICTION_BATCH = 100
+
+class IncompleteTranscriptionError(Exception):
+    """Raised when chunks of a checkpointed transcription failed. Retrying the same request_id redoes only those chunks."""
+
+    def __init__(self, request_id, failed, total):
+        super().__init__(f"{failed} of {total} chunks could not be recognized")
+        self.request_id = request_id
+        self.failed = failed
+        self.total = total
+
+_counters = HitCounters("evictions")
+
+def cache_stats():
+    """Return this process's hit/miss/eviction counters and the hit rate."""
+    return _counters.snapshot()
+
+def hash_pcm(audio_source):
+    """Return a sha256 of the decoded 16 kHz mono PCM, fed one decoded block at a time."""
+    digest = hashlib.sha256()
+    for block in iter_raw_blocks(audio_source, TARGET_SAMPLE_RATE):
+        digest.update(block)
+    return digest
+
+def cache_key(pcm_digest, noise_reduction, backend_name):
+    """
+    Hash normalized PCM together with the settings that affect the transcript.
+
+    Because the key is computed from decoded 16 kHz mono samples rather than
+    container bytes, the same recording uploaded as webm or wav maps to the
+    same entry.
+
+    Args:
+        pcm_digest (hashlib hash): sha256 of the PCM, see hash_pcm
+        noise_reduction (bool): Whether the bandpass filter is applied
+        backend_name (str): Recognition engine
+    """
+    digest = pcm_digest.copy()
+    digest.update(f"|{TARGET_SAMPLE_RATE}|{int(bool(noise_reduction))}|{backend_name}".encode())
+    return digest.hexdigest()
+
+def lookup(key):
+    """Return the cached transcript for a key, or None on a miss."""
+    entry = db.session.get(TranscriptCache, key)
+    if entry is None:
+        _counters.count("misses")
+        return None
+    _counters.count("hits")
+    entry.hit_count += 1
+    entry.last_used_at = datetime.datetime.utcnow()
+    db.session.commit()
+    return entry.transcript_text
+
+def store(key, transcript_text, chunk_texts=None):
+    """Insert or replace a cache entry, then evict down to TRANSCRIPT_CACHE_MAX_BYTES."""
+    chunks_json = json.dumps(chunk_texts) if chunk_texts is not None else None
+    size = len(transcript_text.encode()) + len(chunks_json.encode() if chunks_json else b"")
+    entry = db.session.get(TranscriptCache, key) or TranscriptCache(key=key, hit_count=0)
+    entry.transcript_text = transcript_text
+    entry.chunk_texts = chunks_json
+    entry.size_bytes = size
+    entry.last_used_at = datetime.datetime.utcnow()
+    db.session.add(entry)
+    db.session.commit()
+    evict()
+
+def evict(max_bytes=None):
+    """Delete least recently used entries until the cache fits in max_bytes."""
+    max_bytes = TRANSCRIPT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    total = db.session.query(func.coalesce(func.sum(TranscriptCache.size_bytes), 0)).scalar()
+    evicted = 0
+    while total > max_bytes:
+        oldest = TranscriptCache.query.order_by(TranscriptCache.last_used_at.asc()).limit(EVICTION_BATCH).all()
+        if not oldest:
+            break
+        for entry in oldest:
+            if total <= max_bytes:
+                break
+            total -= entry.size_bytes
+            db.session.delete(entry)
+            evicted += 1
+        db.session.commit()
+    if evicted:
+        _counters.count("evictions", evicted)
+        logger.info(f"Evicted {evicted} transcript cache entries, {total} bytes remain")
+
+def transcribe_with_cache(audio_source, noise_reduction=True, max_workers=None, backend=None, request_id=None):
+    """
+    Transcribe audio, reusing a previous transcript of the same PCM.
+
+    On a hit the filter, split and recognition stages are skipped entirely.
+    Accepts the same arguments as transcription.transcribe_audio (in-memory mode).
+    With a request_id, chunk results are checkpointed so a retry of the same
+    request only redoes missing or failed chunks. If chunks failed, nothing
+    is cached or returned; IncompleteTranscriptionError leaves the
+    checkpoints for the retry.
+
+    Errors are raised rather than turned into an empty transcript, so that
+    callers can retry decoder, recognizer and database failures.
+
+    Returns:
+        str: The full transcript, "" if no speech was recognized
+
+    Raises:
+        IncompleteTranscriptionError: Chunks of a request_id transcription failed
+        AudioDecodeError: ffmpeg could not decode the audio
+    """
+    if backend is None or isinstance(backend, str):
+        backend = get_backend(backend)
+    failures = []
+    if not (TRANSCRIPT_CACHE_ENABLED or request_id):
+        chunk_texts = transcribe_stream(audio_source, noise_reduction=noise_reduction, max_workers=max_workers, backend=backend)
+        return " ".join(text for text in chunk_texts if text)
+
+    # A first decode pass only hashes the PCM, so a cache hit costs no recognition
+    # and checkpoints of an earlier attempt can be matched before anything is recognized
+    source = replayable(audio_source)
+    key = cache_key(hash_pcm(source()), noise_reduction, backend.name)
+    if TRANSCRIPT_CACHE_ENABLED:
+        cached = lookup(key)
+        if cached is not None:
+            logger.info(f"Transcript cache hit for {key[:12]}")
+            return cached
+
+    if request_id:
+        chunk_texts, failed = transcribe_resumable(source(), request_id, key, noise_reduction=noise_reduction,
+                                                   max_workers=max_workers, backend=backend)
+    else:
+        chunk_texts = transcribe_stream(source(), noise_reduction=noise_reduction, max_workers=max_workers, backend=backend,
+                                        on_chunk=lambda index, start, end, text, failed: failures.append(failed))
+        failed = sum(failures)
+    full_transcript = " ".join(text for text in chunk_texts if text)
+    logger.info(f"Full transcription complete. Length: {len(full_transcript)} characters")
+    if failed and request_id:
+        logger.warning(f"{failed} chunks of request {request_id} failed and are kept for a retry")
+        raise IncompleteTranscriptionError(request_id, failed, len(chunk_texts))
+    if TRANSCRIPT_CACHE_ENABLED and full_transcript and not failed:
+        store(key, full_transcript, chunk_texts)
+    if request_id:
+        clear_checkpoints(request_id)
+    return full_transcript
@@ -1,54 +1,60 @@
 import os
 import logging
 import tempfile
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
 import speech_recognition as sr
 from pydub import AudioSegment
 from pydub.silence import split_on_silence
-from scipy.signal import butter, lfilter
+from config import env_flag
+from noise_filter import BandpassFilter
+from audio_decoder import iter_pcm_blocks, replayable
+from segmentation import IncrementalSegmenter
+from recognizers import get_backend
 
 logger = logging.getLogger(__name__)
 
-def apply_noise_reduction(audio_segment, sample_rate=16000):
+# Keep decoded PCM in memory from decode to recognition instead of round-tripping
+# every intermediate stage through temporary WAV files.
+IN_MEMORY_PIPELINE = env_flag("TRANSCRIPTION_IN_MEMORY", True)
+
+TARGET_SAMPLE_RATE = 16000
+# Seconds the file-based path consumes per chunk in adjust_for_ambient_noise.
+AMBIENT_NOISE_DURATION = 0.2
+
+# Chunks are recognized concurrently. The per-request limit bounds the thread pool
+# of one transcribe_audio call, the per-process limit bounds in-flight recognizer
+# calls across all requests served by this worker.
+RECOGNITION_REQUEST_CONCURRENCY = int(os.environ.get("RECOGNITION_REQUEST_CONCURRENCY", "4"))
+RECOGNITION_PROCESS_CONCURRENCY = int(os.environ.get("RECOGNITION_PROCESS_CONCURRENCY", "16"))
+_recognition_slots = threading.BoundedSemaphore(RECOGNITION_PROCESS_CONCURRENCY)
+
+SILENCE_SPLIT_PARAMS = dict(min_silence_len=500, silence_thresh=-40, keep_silence=300)
+# Adjacent chunks are merged up to the target length and chunks over the
+# maximum are split at their quietest point. A target of 0 disables merging.
+CHUNK_TARGET_SECONDS = float(os.environ.get("TRANSCRIPTION_CHUNK_TARGET_SECONDS", "15"))
+CHUNK_MAX_SECONDS = float(os.environ.get("TRANSCRIPTION_CHUNK_MAX_SECONDS", "30"))
+
+def apply_noise_reduction(audio_segment, sample_rate=None):
     """
     Apply a bandpass filter to reduce noise in audio.
     
     Args:
         audio_segment (AudioSegment): The audio segment to filter
-        sample_rate (int): Sample rate of the audio
+        sample_rate (int): Sample rate of the audio, defaults to the segment's
         
     Returns:
         AudioSegment: Filtered audio segment
     """
-    # Convert audio segment to numpy array
-    audio_array = np.array(audio_segment.get_array_of_samples())
-    
-    # Convert to float for signal processing
-    if audio_segment.sample_width == 2:  # 16-bit audio
-        audio_array = audio_array.astype(np.float32) / 32768.0
-    
-    # Design bandpass filter (speech typically between 300Hz-3400Hz)
-    nyq = 0.5 * sample_rate
-    low_cutoff = 300 / nyq
-    high_cutoff = 3400 / nyq
-    b, a = butter(4, [low_cutoff, high_cutoff], btype='band')
-    
-    # Apply filter
-    filtered_audio = lfilter(b, a, audio_array)
-    
-    # Convert back to original format
-    if audio_segment.sample_width == 2:
-        filtered_audio = (filtered_audio * 32768.0).astype(np.int16)
+    sample_rate = sample_rate or audio_segment.frame_rate
+    band_filter = BandpassFilter(sample_rate, channels=audio_segment.channels)
+    filtered_audio = band_filter.process_pcm(audio_segment.raw_data, audio_segment.sample_width)
     
     # Create new audio segment from filtered data
-    filtered_segment = AudioSegment(
-        filtered_audio.tobytes(),
-        frame_rate=sample_rate,
-        sample_width=audio_segment.sample_width,
-        channels=audio_segment.channels
-    )
-    
-    return filtered_segment
+    return audio_segment._spawn(filtered_audio.tobytes(), overrides={'frame_rate': sample_rate})
 
 def resample_audio(audio_segment, target_rate=16000):
     """
@@ -63,7 +69,255 @@ def resample_audio(audio_segment, target_rate=16000):
     """
     return audio_segment.set_frame_rate(target_rate)
 
-def transcribe_audio(audio_file_path, noise_reduction=True):
+def pcm_to_audio_data(samples, sample_rate=TARGET_SAMPLE_RATE, skip_seconds=0):
+    """
+    Build recognizer input directly from 16-bit mono PCM samples.
+    
+    Nothing is dropped by default: a chunk may start at a forced cut in the
+    middle of speech, where skipping the first AMBIENT_NOISE_DURATION like
+    the file-based path's adjust_for_ambient_noise would lose words.
+    
+    Args:
+        samples (np.ndarray): int16 mono samples
+        sample_rate (int): Sample rate of the samples
+        skip_seconds (float): Leading audio to drop
+        
+    Returns:
+        sr.AudioData: Audio ready for the recognizer
+    """
+    skip = int(skip_seconds * sample_rate)
+    if skip and len(samples) > skip:
+        samples = samples[skip:]
+    return sr.AudioData(np.ascontiguousarray(samples, dtype=np.int16).tobytes(), sample_rate, 2)
+
+def _chunk_text(result, index):
+    """Turn a backend result (text or exception) into chunk text, logging failures."""
+    if isinstance(result, sr.UnknownValueError):
+        logger.warning(f"Could not understand audio in chunk {index+1}")
+    elif isinstance(result, sr.RequestError):
+        logger.error(f"API error in chunk {index+1}: {str(result)}")
+    elif isinstance(result, Exception):
+        logger.error(f"Error processing chunk {index+1}: {str(result)}")
+    else:
+        logger.info(f"Chunk {index+1} transcribed: '{result[:30]}...' ({len(result)} chars)")
+        return result
+    return ""
+
+def is_retryable(result):
+    """Whether a chunk result is a failure worth retrying (anything but 'no speech')."""
+    return isinstance(result, Exception) and not isinstance(result, sr.UnknownValueError)
+
+def recognize_chunks(audio_chunks, max_workers=None, backend=None, indices=None, on_chunk=None):
+    """
+    Recognize chunks concurrently and return their texts in chunk order.
+    
+    Backends with a batch_size above 1 receive that many chunks per call.
+    
+    Args:
+        audio_chunks (list[sr.AudioData]): Chunks to recognize
+        max_workers (int): Concurrency limit for this call. Defaults to
+            RECOGNITION_REQUEST_CONCURRENCY. In-flight calls are further capped
+            process-wide by RECOGNITION_PROCESS_CONCURRENCY.
+        backend (RecognizerBackend): Engine to use, defaults to get_backend()
+        indices (list[int]): Chunk numbers used in logs and callbacks when only
+            part of a recording is recognized. Defaults to 0..n-1.
+        on_chunk (callable): Called as on_chunk(index, text, failed) in the
+            calling thread as each chunk completes, in completion order
+        
+    Returns:
+        list[str]: One entry per chunk, "" for chunks that failed
+    """
+    total = len(audio_chunks)
+    if total == 0:
+        return []
+    backend = backend or get_backend()
+    indices = list(range(total)) if indices is None else list(indices)
+    label_total = max(indices) + 1
+    batch_size = max(1, backend.batch_size)
+    batches = [range(start, min(start + batch_size, total)) for start in range(0, total, batch_size)]
+    workers = max(1, min(max_workers or RECOGNITION_REQUEST_CONCURRENCY, len(batches)))
+    
+    def _recognize(batch):
+        with _recognition_slots:
+            if len(batch) == 1:
+                logger.info(f"Processing chunk {indices[batch[0]]+1}/{label_total}")
+                try:
+                    return [backend.recognize(audio_chunks[batch[0]])]
+                except Exception as e:
+                    return [e]
+            logger.info(f"Processing chunks {indices[batch[0]]+1}-{indices[batch[-1]]+1}/{label_total}")
+            try:
+                return backend.recognize_batch([audio_chunks[i] for i in batch])
+            except Exception as e:
+                return [e] * len(batch)
+    
+    texts = [""] * total
+    
+    def _collect(batch, results):
+        for i, result in zip(batch, results):
+            texts[i] = _chunk_text(result, indices[i])
+            if on_chunk:
+                on_chunk(indices[i], texts[i], is_retryable(result))
+    
+    if workers == 1:
+        for batch in batches:
+            _collect(batch, _recognize(batch))
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recognize") as pool:
+            futures = {pool.submit(_recognize, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                _collect(futures[future], future.result())
+    return texts
+
+def transcribe_audio(audio_file_path, noise_reduction=True, in_memory=None, max_workers=None, backend=None):
+    """
+    Transcribe an audio file or in-memory audio.
+    
+    Args:
+        audio_file_path (str | file-like | bytes): The audio to transcribe.
+            Only paths are accepted by the file-based pipeline.
+        noise_reduction (bool): Whether to apply the bandpass filter
+        in_memory (bool): Stream PCM from a single ffmpeg decode through the
+            pipeline without temporary files. Defaults to IN_MEMORY_PIPELINE.
+        max_workers (int): Per-request recognition concurrency
+        backend (RecognizerBackend | str): Recognition engine or its name,
+            defaults to RECOGNIZER_BACKEND
+        
+    Returns:
+        str: The full transcript, or "" on failure
+    """
+    if in_memory is None:
+        in_memory = IN_MEMORY_PIPELINE
+    if backend is None or isinstance(backend, str):
+        backend = get_backend(backend)
+    if in_memory:
+        return _transcribe_in_memory(audio_file_path, noise_reduction=noise_reduction, max_workers=max_workers, backend=backend)
+    return _transcribe_via_files(audio_file_path, noise_reduction=noise_reduction, max_workers=max_workers, backend=backend)
+
+def transcribe_stream(audio_source, noise_reduction=True, max_workers=None, backend=None, done=None, on_chunk=None):
+    """
+    Transcribe audio with bounded memory, block by block.
+    
+    Decoded blocks flow through the stateful bandpass filter into an
+    incremental segmenter, and each closed segment is recognized while
+    decoding continues. At most two segments per worker are queued, so memory
+    stays bounded regardless of the recording length.
+    
+    If no frame reaches the silence threshold, the recording is decoded
+    again and recognized whole, in pieces of at most CHUNK_MAX_SECONDS, as
+    the file-based path does.
+    
+    Args:
+        audio_source (str | file-like | bytes): The audio to transcribe
+        noise_reduction (bool): Whether to apply the bandpass filter
+        max_workers (int): Per-request recognition concurrency
+        backend (RecognizerBackend): Recognition engine
+        done (dict): Chunk index -> (start, end, text) of chunks recognized by an
+            earlier attempt. A segment closing with the same bounds reuses the
+            text instead of being recognized again.
+        on_chunk (callable): Called as on_chunk(index, start, end, text, failed)
+            in the calling thread for every newly recognized chunk, in order
+        
+    Returns:
+        list[str]: Text per chunk in order, "" for chunks that failed
+    """
+    backend = backend or get_backend()
+    source = replayable(audio_source)
+    workers = max(1, max_workers or RECOGNITION_REQUEST_CONCURRENCY)
+    band_filter = BandpassFilter(TARGET_SAMPLE_RATE) if noise_reduction else None
+    segmenter = IncrementalSegmenter(TARGET_SAMPLE_RATE, max_segment_seconds=CHUNK_MAX_SECONDS,
+                                     target_seconds=CHUNK_TARGET_SECONDS, **SILENCE_SPLIT_PARAMS)
+    done = done or {}
+    chunks = []  # (start, end, future of (text, failed) or None when reused, reused text)
+    in_flight = deque()
+    reported = 0
+    
+    def _recognize(index, samples):
+        audio_data = pcm_to_audio_data(samples, TARGET_SAMPLE_RATE)
+        outcome = []
+        text = recognize_chunks([audio_data], max_workers=1, backend=backend, indices=[index],
+                                on_chunk=lambda _, __, failed: outcome.append(failed))[0]
+        return text, bool(outcome and outcome[0])
+    
+    def _report(wait):
+        # Hand finished chunks to on_chunk in order, from this thread
+        nonlocal reported
+        while reported < len(chunks):
+            start, end, future, _ = chunks[reported]
+            if future is not None:
+                if not wait and not future.done():
+                    return
+                text, failed = future.result()
+                if on_chunk:
+                    on_chunk(reported, start, end, text, failed)
+            reported += 1
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recognize") as pool:
+        def _submit(closed):
+            for start, end, samples in closed:
+                index = len(chunks)
+                previous = done.get(index)
+                if previous is not None and (previous[0], previous[1]) == (start, end):
+                    chunks.append((start, end, None, previous[2]))
+                    continue
+                while len(in_flight) >= 2 * workers:
+                    in_flight.popleft().result()
+                future = pool.submit(_recognize, index, samples)
+                chunks.append((start, end, future, None))
+                in_flight.append(future)
+            _report(wait=False)
+        
+        for block in iter_pcm_blocks(source(), TARGET_SAMPLE_RATE):
+            if band_filter:
+                block = band_filter.process_pcm(block)
+            _submit(segmenter.feed(block))
+        _submit(segmenter.finish())
+        if not chunks and segmenter.received_samples:
+            logger.warning("Could not split audio on silence, processing as one chunk")
+            _submit(_whole_recording(source(), noise_reduction))
+        _report(wait=True)
+    
+    reused = sum(future is None for _, _, future, _ in chunks)
+    raw_count, raw_mean, _, _ = segmenter.stats()
+    mean = sum(end - start for start, end, _, _ in chunks) / TARGET_SAMPLE_RATE / max(len(chunks), 1)
+    logger.info(f"Streamed {segmenter.received_samples / TARGET_SAMPLE_RATE:.1f}s of audio in {len(chunks)} chunks "
+                f"(avg {mean:.1f}s), coalesced from {raw_count} (avg {raw_mean:.1f}s), {reused} reused")
+    return [text if future is None else future.result()[0] for _, _, future, text in chunks]
+
+def _whole_recording(audio_source, noise_reduction):
+    # Decode and filter the recording again, as consecutive pieces of at most CHUNK_MAX_SECONDS
+    band_filter = BandpassFilter(TARGET_SAMPLE_RATE) if noise_reduction else None
+    piece_samples = int(CHUNK_MAX_SECONDS * TARGET_SAMPLE_RATE)
+    piece, start = [], 0
+    for block in iter_pcm_blocks(audio_source, TARGET_SAMPLE_RATE):
+        if band_filter:
+            block = band_filter.process_pcm(block)
+        piece.append(block)
+        while sum(map(len, piece)) >= piece_samples:
+            samples = np.concatenate(piece)
+            yield start, start + piece_samples, samples[:piece_samples]
+            piece, start = [samples[piece_samples:]], start + piece_samples
+    samples = np.concatenate(piece) if piece else np.empty(0, dtype=np.int16)
+    if len(samples):
+        yield start, start + len(samples), samples
+
+def _transcribe_in_memory(audio_source, noise_reduction=True, max_workers=None, backend=None):
+    try:
+        if isinstance(audio_source, str) and not os.path.isfile(audio_source):
+            logger.error(f"File not found: {audio_source}")
+            return ""
+        
+        chunk_texts = transcribe_stream(audio_source, noise_reduction=noise_reduction, max_workers=max_workers, backend=backend)
+        
+        full_transcript = " ".join(text for text in chunk_texts if text)
+        logger.info(f"Full transcription complete. Length: {len(full_transcript)} characters")
+        return full_transcript
+        
+    except Exception as e:
+        logger.error(f"Error in transcribe_audio: {str(e)} with traceback: {traceback.format_exc()}")
+        return ""
+
+def _transcribe_via_files(audio_file_path, noise_reduction=True, max_workers=None, backend=None):
     temp_files = []
     try:
         recognizer = sr.Recognizer()
@@ -119,28 +373,18 @@ def transcribe_audio(audio_file_path, noise_reduction=True):
             chunks = [audio]
         logger.info(f"Split into {len(chunks)} chunks")
         
-        transcript_pieces = []
+        audio_chunks = []
         for i, chunk in enumerate(chunks):
             chunk_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
             chunk_path = chunk_file.name
             chunk_file.close()
             temp_files.append(chunk_path)
             chunk.export(chunk_path, format='wav', parameters=["-acodec", "pcm_s16le"])
-            logger.info(f"Processing chunk {i+1}/{len(chunks)}")
             
             with sr.AudioFile(chunk_path) as source:
-                recognizer.adjust_for_ambient_noise(source, duration=0.2)
-                audio_data = recognizer.record(source)
-                try:
-                    chunk_text = recognizer.recognize_google(audio_data)
-                    transcript_pieces.append(chunk_text)
-                    logger.info(f"Chunk {i+1} transcribed: '{chunk_text[:30]}...' ({len(chunk_text)} chars)")
-                except sr.UnknownValueError:
-                    logger.warning(f"Could not understand audio in chunk {i+1}")
-                except sr.RequestError as e:
-                    logger.error(f"API error in chunk {i+1}: {str(e)}")
-                except Exception as e:
-                    logger.error(f"Error processing chunk {i+1}: {str(e)}")
+                recognizer.adjust_for_ambient_noise(source, duration=AMBIENT_NOISE_DURATION)
+                audio_chunks.append(recognizer.record(source))
+        transcript_pieces = [text for text in recognize_chunks(audio_chunks, max_workers=max_workers, backend=backend) if text]
         
         full_transcript = " ".join(transcript_pieces)
         logger.info(f"Full transcription complete. Length: {len(full_transcript)} characters")
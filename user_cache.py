@@ -0,0 +1,82 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+from counters import HitCounters
+from models import User
+
+logger = logging.getLogger(__name__)
+
+# Seconds a loaded user is reused by this process before it is read again.
+# Changes made through edit_user/delete_user are applied at once in the
+# process that made them; other processes see them after at most the TTL.
+# 0 disables the cache.
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get("USER_CACHE_MAX_ENTRIES", "10000"))
+
+_entries = OrderedDict()  # user id -> (expires_at, detached User snapshot)
+_lock = threading.Lock()
+_counters = HitCounters("expired", "invalidations")
+
+def cache_stats():
+    """Return this process's hit/miss/expiry/invalidation counters, hit rate and size."""
+    return _counters.snapshot(size=len(_entries))
+
+def _snapshot(user):
+    # A detached copy owned by the cache, so no request session ever expires or modifies it
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+def get_user(user_id):
+    """
+    Return a user for the current request, from the cache when possible.
+
+    A hit merges the cached snapshot into the request's session without a
+    query, so the returned user behaves like a freshly loaded one
+    (relationships load lazily, changes are flushed as usual).
+
+    Args:
+        user_id (int): Primary key of the user
+
+    Returns:
+        User | None: The user, or None if it does not exist
+    """
+    if USER_CACHE_TTL <= 0:
+        return db.session.get(User, user_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is not None and entry[0] > now:
+            _entries.move_to_end(user_id)
+            _counters.count("hits")
+            snapshot = entry[1]
+        else:
+            if entry is not None:
+                del _entries[user_id]
+                _counters.count("expired")
+            _counters.count("misses")
+            snapshot = None
+    if snapshot is not None:
+        return db.session.merge(snapshot, load=False)
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        with _lock:
+            _entries[user_id] = (now + USER_CACHE_TTL, _snapshot(user))
+            _entries.move_to_end(user_id)
+            while len(_entries) > USER_CACHE_MAX_ENTRIES:
+                _entries.popitem(last=False)
+    return user
+
+def invalidate_user(user_id):
+    """Drop a user from this process's cache after the row changed or was deleted."""
+    with _lock:
+        removed = _entries.pop(user_id, None) is not None
+    if removed:
+        _counters.count("invalidations")
+        logger.debug(f"Invalidated cached user {user_id}")